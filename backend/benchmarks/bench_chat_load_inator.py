@@ -0,0 +1,112 @@
+"""
+note endpoint latency while chats are in flight,
+the async chat endpoint vs the blocking retriever called from an async def
+(what /projects/{id}/chat did)
+
+    cd backend && python -m benchmarks.bench_chat_load_inator --chats 8 --generate-latency 0.5
+
+runs the real app under uvicorn against the fake ollama server, with a small
+store written straight into the vectorstores dir; while `chats` chats run
+at once, a note is fetched every --poll-interval seconds and timed
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+from statistics import median
+
+from benchmarks.temp_data import temp_data_inator
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def load(base: str, chat_path: str, chats: int, poll_interval: float) -> tuple[list[float], float]:
+    import httpx
+
+    latencies = []
+    async with httpx.AsyncClient(base_url=base, timeout=None) as client:
+        async def chat(n: int):
+            response = await client.post(chat_path, json={"text": f"question {n}"})
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(chat(n)) for n in range(chats)]
+        # no chats: a fixed number of reads, the idle baseline
+        idle_reads = 0 if chats else 100
+        while not all(task.done() for task in tasks) or len(latencies) < idle_reads:
+            sent = time.perf_counter()
+            response = await client.get("/projects/bench/notes/get/note.md")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - sent) * 1000)
+            await asyncio.sleep(poll_interval)
+        await asyncio.gather(*tasks)
+        return latencies, time.perf_counter() - start
+
+
+def report(label: str, latencies: list[float], seconds: float):
+    print(f"{label:<22} {len(latencies):>4} note reads  p50 {median(latencies):8.1f} ms  "
+          f"p95 {percentile(latencies, 0.95):8.1f} ms  max {max(latencies):8.1f} ms  chats took {seconds:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=8)
+    parser.add_argument("--generate-latency", type=float, default=0.5, help="seconds per fake llm call")
+    parser.add_argument("--poll-interval", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp:
+        os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+        from benchmarks.fake_ollama import FakeOllamaServer
+
+        translated = {
+            "rewritten": "question",
+            "subqueries": [{"text": "question", "domain": "science", "subject": "physics"}],
+        }
+        with FakeOllamaServer(dim=64, generate_latency=args.generate_latency, response=json.dumps(translated)) as fake:
+            os.environ["OLLAMA_HOST"] = fake.url
+            import uvicorn
+            from fastapi import Request
+            from langchain_core.documents import Document
+            from cerebrum_inator import create_api_server
+            from cerebrum_core.store_pool_inator import store_pool
+            from cerebrum_core.taxonomy_inator import shared_taxonomy_inator
+            from local_server import routes_process_files, routes_projects
+
+            store_path = routes_process_files.vectorstores_dir / "science" / "physics"
+            store_path.mkdir(parents=True, exist_ok=True)
+            with store_pool.lease_inator(str(store_path), "physics", routes_process_files.embedding_model) as store:
+                store.add_documents([Document(page_content=f"fact number {n}") for n in range(200)])
+            shared_taxonomy_inator(routes_process_files.vectorstores_dir).add_chunks_inator(store_path, "physics", 200)
+
+            notes = routes_projects.get_notes_dir("bench")
+            (notes / "note.md").write_text("note\nbody")
+
+            app = create_api_server()
+
+            @app.post("/bench/blocking-chat")
+            async def blocking_chat(request: Request):
+                """the old endpoint: sync retriever calls inside async def"""
+                state = request.app.state.retriever.answer_inator(user_query="question")
+                return {"reply": state.response}
+
+            server = uvicorn.Server(uvicorn.Config(app, port=args.port, log_level="warning"))
+            threading.Thread(target=server.run, daemon=True).start()
+            while not server.started:
+                time.sleep(0.05)
+
+            base = f"http://127.0.0.1:{args.port}"
+            report("no chats", *asyncio.run(load(base, "/projects/bench/chat", 0, args.poll_interval)))
+            report("blocking chat", *asyncio.run(load(base, "/bench/blocking-chat", args.chats, args.poll_interval)))
+            report("async chat", *asyncio.run(load(base, "/projects/bench/chat", args.chats, args.poll_interval)))
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+chunk size distribution and embedding throughput,
+header-only chunking vs token-aware chunking
+
+    cd backend && python -m benchmarks.bench_chunk_inator --markdown path/to/book.md
+
+without --markdown a synthetic textbook with a few huge sections is used.
+embedding runs against benchmarks.fake_ollama, whose latency grows with
+input length the way a real embedding server's does
+"""
+import os
+import time
+import random
+import argparse
+from pathlib import Path
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.temp_data import temp_data_inator
+
+MODEL = "fake-embedding"
+WORDS = "cell membrane protein enzyme kinetics pathway receptor signal gene expression".split()
+
+
+def synthetic_book(path: Path, chapters: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    parts = []
+    for chapter in range(chapters):
+        parts.append(f"# Chapter {chapter}\n")
+        for section in range(rng.randint(2, 6)):
+            # a few sections are enormous, like a textbook appendix or table dump
+            words = rng.choice([200, 400, 800, 1500, 30_000 if rng.random() < 0.1 else 600])
+            parts.append(f"## Section {chapter}.{section}\n")
+            parts.append(" ".join(rng.choice(WORDS) for _ in range(words)) + "\n")
+    path.write_text("\n".join(parts), encoding="utf-8")
+    return path
+
+
+def distribution(label: str, chunks, token_inator):
+    sizes = sorted(chunk.metadata.get("tokens") or token_inator(chunk.page_content) for chunk in chunks)
+
+    def pct(p):
+        return sizes[min(len(sizes) - 1, int(len(sizes) * p))]
+
+    print(f"{label:<14} chunks={len(sizes):>6}  min={sizes[0]:>6}  p50={pct(0.5):>6}  "
+          f"p90={pct(0.9):>6}  p99={pct(0.99):>6}  max={sizes[-1]:>6}  total={sum(sizes):>9}")
+    return sizes
+
+
+def embed(label: str, ingest, chunks, persist_directory: Path):
+    start = time.perf_counter()
+    for batch in ingest.batch_inator(chunks):
+        ingest.embedd_inator(chunks=batch, collection_name=label.replace(" ", "-"))
+    elapsed = time.perf_counter() - start
+    tokens = sum(chunk.metadata.get("tokens") or ingest.token_inator(chunk.page_content) for chunk in chunks)
+    print(f"{label:<14} {elapsed:8.2f}s  {len(chunks) / elapsed:9.1f} chunks/sec  {tokens / elapsed:11.0f} tokens/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--markdown", type=Path, default=None, help="sample book, synthetic if omitted")
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--context-length", type=int, default=8192, help="context window the fake model reports")
+    parser.add_argument("--char-latency-us", type=float, default=2.0, help="fake server latency per input character")
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp, FakeOllamaServer(
+        char_latency=args.char_latency_us / 1_000_000, context_length=args.context_length
+    ) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+
+        from langchain_text_splitters import MarkdownHeaderTextSplitter
+        from cerebrum_core.ingest_inator import IngestInator
+
+        markdown = args.markdown or synthetic_book(Path(tmp) / "book.md", args.chapters)
+        ingest = IngestInator(filepath=markdown, embedding_model=MODEL, vectorstores_path=Path(tmp) / "stores")
+        print(f"{markdown.name}: {markdown.stat().st_size / 1e6:.1f} MB, max chunk tokens {ingest.chunk_size_inator()}\n")
+
+        headers = [(f"{'#' * level}", f"Header {level}") for level in range(1, 7)]
+        header_chunks = MarkdownHeaderTextSplitter(headers_to_split_on=headers, strip_headers=False).split_text(
+            markdown.read_text(encoding="utf-8")
+        )
+        start = time.perf_counter()
+        token_chunks = ingest.chunk_inator(markdown_filepath=markdown)
+        chunk_seconds = time.perf_counter() - start
+
+        distribution("header-only", header_chunks, ingest.token_inator)
+        distribution("token-aware", token_chunks, ingest.token_inator)
+        print(f"token-aware chunking took {chunk_seconds:.2f}s\n")
+
+        embed("header-only", ingest, header_chunks, Path(tmp) / "stores")
+        embed("token-aware", ingest, token_chunks, Path(tmp) / "stores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+generate_inator latency per compression mode, against the fake ollama server
+
+    cd backend && python -m benchmarks.bench_compression_inator --chunks 5 --generate-latency 0.4
+
+    sequential   one summary call per chunk, one after another (what generate_inator did)
+    concurrent   one summary call per chunk, SUMMARY_CONCURRENCY at a time
+    batched      one call summarizing every chunk
+    raw          no summaries, chunk text up to RAW_CONTEXT_TOKENS
+
+--prompt-char-latency makes longer prompts slower, so the batched and raw
+prompts pay for their size; answer quality has to be judged on a real model
+"""
+import os
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from statistics import median
+
+from benchmarks.temp_data import temp_data_inator
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5)
+    parser.add_argument("--chunk-chars", type=int, default=1500)
+    parser.add_argument("--generate-latency", type=float, default=0.4, help="seconds per llm call")
+    parser.add_argument("--prompt-char-latency", type=float, default=0.00002, help="extra seconds per prompt character")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp:
+        os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+        from benchmarks.fake_ollama import FakeOllamaServer
+
+        with FakeOllamaServer(generate_latency=args.generate_latency, prompt_char_latency=args.prompt_char_latency,
+                              response="a short summary of the facts") as fake:
+            os.environ["OLLAMA_HOST"] = fake.url
+            from langchain_core.documents import Document
+            from cerebrum_core import retriever_inator
+            from cerebrum_core.taxonomy_inator import TaxonomyInator
+            from cerebrum_core.retriever_inator import RetrieverInator
+
+            retriever = RetrieverInator(tmp, "bench", "bench", taxonomy=TaxonomyInator(Path(tmp)))
+            results = [[
+                Document(page_content=f"chunk {n}: " + f"fact {n} about the subject. " * (args.chunk_chars // 28))
+                for n in range(args.chunks)
+            ]]
+
+            def run(mode: str) -> tuple[float, int, dict]:
+                seconds, calls, timings = [], 0, {}
+                for _ in range(args.repeat):
+                    requests, timings = fake.requests, {}
+                    start = time.perf_counter()
+                    asyncio.run(retriever.async_generate_inator("what are the facts?", results, top_k_chunks=args.chunks,
+                                                                compression=mode, timings=timings))
+                    seconds.append(time.perf_counter() - start)
+                    calls = fake.requests - requests
+                return median(seconds), calls, timings
+
+            concurrency = retriever_inator.SUMMARY_CONCURRENCY
+            for label, mode in [("sequential", "concurrent"), ("concurrent", "concurrent"), ("batched", "batched"), ("raw", "raw")]:
+                retriever_inator.SUMMARY_CONCURRENCY = 1 if label == "sequential" else concurrency
+                seconds, calls, timings = run(mode)
+                print(f"{label:<11} {seconds * 1000:8.1f} ms  {calls} llm calls  "
+                      f"compress {timings['compress'] * 1000:7.1f} ms  answer {timings['answer'] * 1000:7.1f} ms")
+            retriever.close_inator()
+
+
+if __name__ == "__main__":
+    main()
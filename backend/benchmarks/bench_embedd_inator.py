@@ -0,0 +1,85 @@
+"""
+chunks/sec for the old per-chunk embedding path vs the batched path
+
+    cd backend && python -m benchmarks.bench_embedd_inator --chunks 1000
+
+runs against benchmarks.fake_ollama so only client/store overhead and
+round trips are measured, not model inference
+"""
+import os
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.temp_data import temp_data_inator
+
+MODEL = "fake-embedding"
+
+
+def make_chunks(count: int, size: int):
+    from langchain_core.documents import Document
+
+    return [
+        Document(
+            page_content=f"chunk {i} " + ("lorem ipsum dolor sit amet " * (size // 27 + 1))[:size],
+            metadata={"Header 1": f"chapter {i // 50}"}
+        )
+        for i in range(count)
+    ]
+
+
+def per_chunk_embedd(chunks, persist_directory: Path):
+    """the pre-batching path: fresh clients and one add call per chunk"""
+    from langchain_chroma import Chroma
+    from langchain_ollama import OllamaEmbeddings
+
+    for chunk in chunks:
+        embedding_llm = OllamaEmbeddings(model=MODEL)
+        chromadb = Chroma(
+            collection_name="bench",
+            persist_directory=str(persist_directory),
+            embedding_function=embedding_llm
+        )
+        chromadb.add_documents([chunk])
+
+
+def batched_embedd(chunks, persist_directory: Path, batch_size: int, max_batch_tokens: int):
+    from cerebrum_core.ingest_inator import IngestInator
+
+    ingest = IngestInator(filepath=persist_directory, embedding_model=MODEL, vectorstores_path=persist_directory)
+    for batch in ingest.batch_inator(chunks, batch_size=batch_size, max_batch_tokens=max_batch_tokens):
+        ingest.embedd_inator(chunks=batch, collection_name="bench")
+
+
+def run(label: str, fn, chunks, *args):
+    with temp_data_inator() as tmp:
+        start = time.perf_counter()
+        fn(chunks, Path(tmp), *args)
+        elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(chunks):>6} chunks  {elapsed:8.2f}s  {len(chunks) / elapsed:10.1f} chunks/sec")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--chunk-chars", type=int, default=1200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--batch-tokens", type=int, default=16_000)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="fake server latency per request")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.chunk_chars)
+    with temp_data_inator() as tmp, FakeOllamaServer(request_latency=args.latency_ms / 1000) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+
+        before = run("per-chunk", per_chunk_embedd, chunks)
+        after = run("batched", batched_embedd, chunks, args.batch_size, args.batch_tokens)
+
+    print(f"speedup      {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+registry ops/sec for a bulk ingest of N files,
+connection per call (the old behaviour) vs the persistent WAL connection,
+with and without batch_inator
+
+    cd backend && python -m benchmarks.bench_registry_inator --files 10000
+
+each file goes through what an ingest does to it:
+register, check converted, mark converted, mark embedded
+"""
+import os
+import time
+import argparse
+from pathlib import Path
+
+from benchmarks.temp_data import temp_data_inator
+
+
+def workload(registry, files: int, markdown: Path, batch_size: int = 0):
+    """4 registry ops per file, committed per call or every batch_size files"""
+    def one(n: int):
+        hash_id = f"{n:064x}"
+        registry.register_inator(original_name=f"book-{n}", sanitized_name=f"Book {n}", hash_id=hash_id)
+        registry.check_inator(hash_id=hash_id, field="converted")
+        registry.updater_inator(status="converted", hash_id=hash_id, markdown_path=markdown)
+        registry.updater_inator(status="embedded", hash_id=hash_id)
+
+    start = time.perf_counter()
+    if batch_size:
+        for first in range(0, files, batch_size):
+            with registry.batch_inator():
+                for n in range(first, min(first + batch_size, files)):
+                    one(n)
+    else:
+        for n in range(files):
+            one(n)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=500, help="files per batch_inator transaction")
+    parser.add_argument("--legacy-files", type=int, default=2_000,
+                        help="files for the connection per call run, it is slow")
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp:
+        import sqlite3
+        import contextlib
+        from cerebrum_core.file_manager_inator import FileRegisterInator
+
+        class ConnectPerCallInator(FileRegisterInator):
+            """what every method did before: connect, default pragmas, commit, close"""
+            def _connect(self):
+                self._local.depth = 0
+                return sqlite3.connect(self.DB_PATH, timeout=30)
+
+            @contextlib.contextmanager
+            def _write_inator(self):
+                conn = self._connect()
+                try:
+                    yield conn
+                    conn.commit()
+                finally:
+                    conn.close()
+
+            @contextlib.contextmanager
+            def batch_inator(self):
+                yield self
+
+        markdown = Path(tmp) / "book.md"
+        markdown.write_text("# book\n")
+        # quiet the per update debug line while timing
+        import builtins
+        real_print, builtins.print = builtins.print, lambda *a, **k: None
+        runs = []
+        try:
+            runs.append(("connect per call", args.legacy_files,
+                         workload(ConnectPerCallInator(db_path="bench/legacy.db"), args.legacy_files, markdown)))
+            runs.append(("persistent wal", args.files,
+                         workload(FileRegisterInator(db_path="bench/wal.db"), args.files, markdown)))
+            runs.append((f"wal + batch of {args.batch_size}", args.files,
+                         workload(FileRegisterInator(db_path="bench/batch.db"), args.files, markdown, args.batch_size)))
+        finally:
+            builtins.print = real_print
+
+        for label, files, seconds in runs:
+            ops = files * 4
+            print(f"{label:<22} {files:>6} files  {seconds:8.2f}s  {ops / seconds:10.0f} ops/sec  "
+                  f"{files / seconds:9.0f} files/sec")
+
+
+if __name__ == "__main__":
+    main()
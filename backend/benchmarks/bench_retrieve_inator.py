@@ -0,0 +1,102 @@
+"""
+retrieve_inator latency for a query split into several routes:
+routes one after another (what retrieve_inator did) vs fanned out,
+and with one store hanging past the route timeout: the first query waits
+the timeout out, later ones skip that store while its search is still stuck
+
+    cd backend && python -m benchmarks.bench_retrieve_inator --routes 4 --embed-latency 0.2
+
+stores are written straight into a temp vectorstores dir, query embeddings
+come from the fake ollama server (--embed-latency per call), every query
+text is new so the embedding cache never answers
+"""
+import os
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from benchmarks.temp_data import temp_data_inator
+
+SUBJECTS = [("science", "physics"), ("science", "chemistry"), ("biology", "genetics")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--routes", type=int, default=4)
+    parser.add_argument("--embed-latency", type=float, default=0.2, help="seconds per query embedding")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=1.0, help="route timeout for the hanging store run")
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp:
+        os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+        from benchmarks.fake_ollama import FakeOllamaServer
+
+        with FakeOllamaServer(dim=64, request_latency=0.0, item_latency=0.0) as fake:
+            os.environ["OLLAMA_HOST"] = fake.url
+            from langchain_core.documents import Document
+            from cerebrum_core.model_inator import Subquery
+            from cerebrum_core.store_pool_inator import store_pool
+            from cerebrum_core.taxonomy_inator import TaxonomyInator
+            from cerebrum_core.retriever_inator import RetrieverInator
+
+            root = Path(tmp) / "vectorstores"
+            taxonomy = TaxonomyInator(root)
+            for domain, subject in SUBJECTS:
+                store_path = root / domain / subject
+                store_path.mkdir(parents=True)
+                with store_pool.lease_inator(str(store_path), subject, "bench") as store:
+                    store.add_documents([Document(page_content=f"{subject} fact {n}") for n in range(300)])
+                taxonomy.add_chunks_inator(store_path, subject, 300)
+            fake.request_latency = args.embed_latency
+
+            retriever = RetrieverInator(str(root), "bench", "bench", taxonomy=taxonomy,
+                                        route_concurrency=args.routes, route_timeout=args.timeout)
+            runs = [0]
+
+            def query() -> dict:
+                runs[0] += 1
+                return {"routes": [
+                    {"subquery": Subquery(text=f"question {runs[0]} part {n}", domain=domain, subject=subject),
+                     "path": str(root / domain / subject)}
+                    for n, (domain, subject) in ((n, SUBJECTS[n % len(SUBJECTS)]) for n in range(args.routes))
+                ]}
+
+            def sequential():
+                constructed_query = query()
+                return [retriever._route_inator(route) for route in constructed_query["routes"]], constructed_query
+
+            def concurrent():
+                constructed_query = query()
+                return asyncio.run(retriever.async_retrieve_inator(constructed_query)), constructed_query
+
+            def timed(label: str, fn):
+                seconds, results, constructed_query = [], [], {}
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    results, constructed_query = fn()
+                    seconds.append(time.perf_counter() - start)
+                errors = [route.get("error") for route in constructed_query["routes"] if route.get("error")]
+                print(f"{label:<28} best {min(seconds) * 1000:8.1f} ms  worst {max(seconds) * 1000:8.1f} ms  "
+                      f"{sum(1 for r in results if r)}/{len(results)} routes answered"
+                      + (f"  ({errors[0]})" if errors else ""))
+
+            timed("one route after another", sequential)
+            timed("fanned out", concurrent)
+
+            # one store hangs well past the timeout
+            route_inator = retriever._route_inator
+
+            def hanging(route, k=3):
+                if route["subquery"].subject == SUBJECTS[0][1]:
+                    time.sleep(args.timeout * 3)
+                return route_inator(route, k)
+
+            retriever._route_inator = hanging
+            timed("fanned out, one store hangs", concurrent)
+            retriever.close_inator()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+per query cost of getting a vectorstore handle and searching it:
+a cold open (index loaded from disk), a new Chroma per query (what
+retrieve_inator did) and the pooled handle
+
+    cd backend && python -m benchmarks.bench_store_pool_inator --chunks 20000
+
+queries go in as vectors so the numbers are the store alone, no embedding calls
+"""
+import os
+import time
+import random
+import argparse
+from pathlib import Path
+
+from benchmarks.temp_data import temp_data_inator
+
+
+def timed(label: str, fn, queries: int):
+    start = time.perf_counter()
+    for n in range(queries):
+        fn(n)
+    seconds = time.perf_counter() - start
+    print(f"{label:<26} {queries:>5} queries  {seconds * 1000 / queries:9.2f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--cold-queries", type=int, default=5, help="cold opens are slow, fewer of them")
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp:
+        os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+        import chromadb
+        from langchain_chroma import Chroma
+        from chromadb.api.shared_system_client import SharedSystemClient
+        from cerebrum_core.store_pool_inator import StorePoolInator
+
+        store_path, collection = str(Path(tmp) / "science" / "physics"), "physics"
+        rng = random.Random(0)
+        vectors = [[rng.random() for _ in range(args.dim)] for _ in range(args.chunks)]
+        client = chromadb.PersistentClient(path=store_path)
+        chroma = client.get_or_create_collection(collection)
+        for first in range(0, args.chunks, 5000):
+            ids = [str(n) for n in range(first, min(first + 5000, args.chunks))]
+            chroma.add(ids=ids, embeddings=vectors[first:first + 5000], documents=[f"chunk {n}" for n in ids])
+        SharedSystemClient._identifier_to_system.pop(store_path).stop()
+
+        def search(store, n):
+            store.max_marginal_relevance_search_by_vector(vectors[n], k=3, fetch_k=15)
+
+        def cold(n):
+            store = Chroma(collection_name=collection, persist_directory=store_path)
+            search(store, n)
+            SharedSystemClient._identifier_to_system.pop(store_path).stop()
+
+        def per_query(n):
+            search(Chroma(collection_name=collection, persist_directory=store_path), n)
+
+        pool = StorePoolInator()
+
+        def pooled(n):
+            with pool.lease_inator(store_path, collection, "bench") as store:
+                search(store, n)
+
+        timed("cold open per query", cold, args.cold_queries)
+        timed("new Chroma per query", per_query, args.queries)
+        SharedSystemClient._identifier_to_system.pop(store_path).stop()
+        timed("pooled handle", pooled, args.queries)
+        print(pool.stats_inator()["opened"], "store opened by the pool")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+knowledgebase walk: Path.glob walker vs the scandir walker,
+and a snapshot diff where nothing changed
+
+    cd backend && python -m benchmarks.bench_walker_inator --files 20000
+
+a synthetic domain/subject/topic tree is built in a temp dir unless --root
+points at a real knowledgebase. --latency-ms adds a sleep per directory
+listing to mimic a network mount, where the parallel listing pays off
+"""
+import os
+import time
+import argparse
+from pathlib import Path
+
+from benchmarks.temp_data import temp_data_inator
+
+
+def glob_walker(root: Path, max_depth: int = 4):
+    """file_walker_inator as it was: glob plus is_file/is_dir per entry"""
+    def recurse(path: Path, parts: list[str]):
+        for file in path.glob("*"):
+            if file.is_file():
+                yield {
+                    "domain": parts[0] if len(parts) > 0 else None,
+                    "subject": parts[1] if len(parts) > 1 else None,
+                    "topic": parts[2] if len(parts) > 2 else None,
+                    "subtopic": parts[3] if len(parts) > 3 else None,
+                    "filepath": file,
+                    "filename": file.name,
+                    "filestem": file.stem,
+                    "file-ext": file.suffix,
+                    "size": file.stat().st_size,
+                }
+            elif file.is_dir() and len(parts) < max_depth:
+                yield from recurse(file, parts + [file.name])
+
+    yield from recurse(root, [])
+
+
+def build_tree(root: Path, files: int):
+    per_dir = 50
+    for n in range(files):
+        d = root / f"domain-{n % 8}" / f"subject-{n % 40}" / f"topic-{(n // per_dir) % 25}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"book-{n}.pdf").write_bytes(b"%PDF" + bytes(n % 97))
+
+
+def timed(label: str, fn, repeat: int = 3):
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {count:>7} files  {best:8.3f}s  {count / best:10.0f} files/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", type=Path, default=None, help="existing tree, synthetic if omitted")
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="extra delay per directory listing")
+    args = parser.parse_args()
+
+    with temp_data_inator() as tmp:
+        from cerebrum_core import file_manager_inator
+        from cerebrum_core.file_manager_inator import file_walker_inator, WalkSnapshotInator
+
+        root = args.root
+        if root is None:
+            root = Path(tmp) / "kb"
+            build_tree(root, args.files)
+
+        if args.latency_ms:
+            delay = args.latency_ms / 1000
+            real_scandir, real_glob = os.scandir, Path.glob
+
+            def slow_scandir(path):
+                time.sleep(delay)
+                return real_scandir(path)
+
+            def slow_glob(self, pattern):
+                time.sleep(delay)
+                return real_glob(self, pattern)
+
+            file_manager_inator.os.scandir = slow_scandir
+            Path.glob = slow_glob
+
+        timed("glob walker", lambda: sum(1 for _ in glob_walker(root)))
+        timed("scandir walker, 1 thread", lambda: sum(1 for _ in file_walker_inator(root, workers=1)))
+        timed("scandir walker, 8 threads", lambda: sum(1 for _ in file_walker_inator(root, workers=8)))
+
+        snapshot = WalkSnapshotInator("bench", root)
+        for info in snapshot.diff_inator()["changed"]:
+            snapshot.record_inator(info)
+        snapshot.save_inator()
+        timed("snapshot diff, no changes", lambda: len(WalkSnapshotInator("bench", root).diff_inator()["unchanged"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+tiny stand-in for the ollama http api, used by the benchmarks
+
+    POST /api/embed     -> deterministic vectors for every input
+    POST /api/generate  -> canned response, slower for longer prompts with prompt_char_latency
+    POST /api/show      -> model info with a context length
+
+per request, per item and per character latency can be set to mimic a real server
+"""
+import json
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaServer:
+    def __init__(self, dim: int = 256, request_latency: float = 0.002, item_latency: float = 0.0005,
+                 generate_latency: float = 0.05, response: str = "ok", char_latency: float = 0.0,
+                 context_length: int = 8192, prompt_char_latency: float = 0.0):
+        self.dim = dim
+        self.request_latency = request_latency
+        self.item_latency = item_latency
+        self.generate_latency = generate_latency
+        self.response = response
+        self.char_latency = char_latency
+        self.context_length = context_length
+        self.prompt_char_latency = prompt_char_latency
+        self.requests = 0
+        self.items = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def vector(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [digest[i % len(digest)] / 255 for i in range(self.dim)]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                data = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests += 1
+
+                if self.path == "/api/embed":
+                    inputs = data.get("input", [])
+                    if isinstance(inputs, str):
+                        inputs = [inputs]
+                    fake.items += len(inputs)
+                    chars = sum(len(t) for t in inputs)
+                    time.sleep(fake.request_latency + fake.item_latency * len(inputs) + fake.char_latency * chars)
+                    self._reply({"model": data.get("model"), "embeddings": [fake.vector(t) for t in inputs]})
+                elif self.path == "/api/generate":
+                    time.sleep(fake.generate_latency + fake.prompt_char_latency * len(data.get("prompt", "")))
+                    self._reply({"model": data.get("model"), "response": fake.response, "done": True})
+                elif self.path == "/api/show":
+                    self._reply({"model_info": {"fake.context_length": fake.context_length}})
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,26 @@
+"""
+app data for a benchmark run, in a temp dir
+
+    with temp_data_inator() as tmp:
+        ...
+
+every CerebrumPaths resolves under tmp while the block runs (registry, caches,
+stores), so a benchmark never reads or writes the real app data
+"""
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+from cerebrum_core.file_manager_inator import CerebrumPaths
+
+
+@contextmanager
+def temp_data_inator():
+    """yields the temp dir (a str, like TemporaryDirectory), removed afterwards"""
+    previous = CerebrumPaths.DATA_DIR_OVERRIDE
+    with tempfile.TemporaryDirectory() as tmp:
+        CerebrumPaths.DATA_DIR_OVERRIDE = Path(tmp)
+        try:
+            yield tmp
+        finally:
+            CerebrumPaths.DATA_DIR_OVERRIDE = previous
@@ -0,0 +1,171 @@
+import time
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from threading import Lock
+from langchain_core.embeddings import Embeddings
+
+from cerebrum_core.file_manager_inator import CerebrumPaths, FileRegisterInator
+
+# ~1GB of 1024-dim float32 vectors
+EMBED_CACHE_MAX_ENTRIES = 250_000
+# hits only touch last_used in memory, written out once this many are pending or this old
+LAST_USED_FLUSH_ENTRIES = 512
+LAST_USED_FLUSH_SECONDS = 30.0
+
+
+class CachedEmbeddingInator(Embeddings):
+    """
+    wraps an embedding model with an on disk cache
+        keyed by (model name, sha256 of text)
+        bounded by max_entries, least recently used go first
+    so re-ingests and repeated queries cost disk reads instead of inference
+        one WAL connection per thread (same pragmas as the registry), and hits
+        don't write: their last_used goes out in batches with the next write
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, db_path: Path | None = None,
+                 max_entries: int = EMBED_CACHE_MAX_ENTRIES) -> None:
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.DB_PATH = db_path or CerebrumPaths().get_kb_dir() / "cache" / "embeddings.db"
+        self.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._local = threading.local()
+        # text_hash -> last hit, not yet written
+        self._touched: dict[str, float] = {}
+        self._touched_since = time.time()
+        self._table_iniatior_inator()
+
+    def _connect(self) -> sqlite3.Connection:
+        """long lived connection, one per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.DB_PATH, timeout=30)
+            for pragma in FileRegisterInator.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        return conn
+
+    def _table_iniatior_inator(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT,
+            text_hash TEXT,
+            vector BLOB,
+            last_used REAL,
+            PRIMARY KEY (model, text_hash)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        conn.commit()
+
+    @staticmethod
+    def _hash_inator(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes = [self._hash_inator(text) for text in texts]
+        now = time.time()
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cached: dict[str, list[float]] = {}
+
+        # sqlite caps bound parameters, look hashes up in slices
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            cursor.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(part))})",
+                (self.model_name, *part)
+            )
+            for text_hash, blob in cursor.fetchall():
+                cached[text_hash] = array("f", blob).tolist()
+
+        # each distinct missing text is embedded once, in a single call
+        missing = {text_hash: text for text_hash, text in zip(hashes, texts) if text_hash not in cached}
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            for text_hash in unique:
+                if text_hash not in missing:
+                    self._touched[text_hash] = now
+            flush = (len(self._touched) >= LAST_USED_FLUSH_ENTRIES
+                     or now - self._touched_since >= LAST_USED_FLUSH_SECONDS)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            # stored as float32, hand back the same precision hits get
+            fresh = {text_hash: array("f", vector) for text_hash, vector in zip(missing.keys(), vectors)}
+            try:
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    [(self.model_name, text_hash, vector.tobytes(), now) for text_hash, vector in fresh.items()]
+                )
+                self._evict_inator(cursor)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            cached.update({text_hash: vector.tolist() for text_hash, vector in fresh.items()})
+
+        if missing or flush:
+            self.flush_inator()
+
+        return [cached[text_hash] for text_hash in hashes]
+
+    def flush_inator(self):
+        """write out the last_used of hits since the last flush"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._touched_since = time.time()
+        if not touched:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE embeddings SET last_used = MAX(last_used, ?) WHERE model = ? AND text_hash = ?",
+                [(last_used, self.model_name, text_hash) for text_hash, last_used in touched.items()]
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    def _evict_inator(self, cursor: sqlite3.Cursor) -> None:
+        """drop least recently used rows once the cache is over max_entries"""
+        cursor.execute("SELECT COUNT(*) FROM embeddings")
+        excess = cursor.fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor.execute("""
+            DELETE FROM embeddings WHERE rowid IN (
+                SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?
+            )
+            """, (excess,))
+
+    def stats_inator(self) -> dict:
+        cursor = self._connect().cursor()
+        cursor.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,))
+        entries = cursor.fetchone()[0]
+
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
@@ -1,15 +1,34 @@
-import re
+import os
+import json
+import queue
 import hashlib
 import sqlite3
+import threading
 from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from platformdirs import PlatformDirs
 
 # init dirs for server
 class CerebrumPaths():
+    # when set, every instance (module level ones included) keeps its data and config here
+    # instead of the platform dirs, e.g benchmarks point the whole app at a temp dir
+    DATA_DIR_OVERRIDE: Path | None = None
+
     def __init__(self, app_name: str = "cerebrum"):
         dirs = PlatformDirs(app_name)
-        self.DATA_DIR = Path(dirs.user_data_dir)
-        self.CONFIG_DIR = Path(dirs.user_config_dir)
+        self._data_dir = Path(dirs.user_data_dir)
+        self._config_dir = Path(dirs.user_config_dir)
+
+    @property
+    def DATA_DIR(self) -> Path:
+        override = CerebrumPaths.DATA_DIR_OVERRIDE
+        return Path(override) if override is not None else self._data_dir
+
+    @property
+    def CONFIG_DIR(self) -> Path:
+        override = CerebrumPaths.DATA_DIR_OVERRIDE
+        return Path(override) / "config" if override is not None else self._config_dir
 
     def init_cerebrum_dirs(self):
         self.DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -39,128 +58,762 @@ path = CerebrumPaths()
 
 
 
-def file_walker_inator(root: Path, max_depth: int = 4):
-    """
-        walk the through knowledgebase_dir, identify files at 
+# directories listed at once, helps most on network mounts
+WALK_WORKERS = 8
+
 
+def file_walker_inator(root: Path, max_depth: int = 4, suffixes: tuple[str, ...] | None = None,
+                       workers: int = WALK_WORKERS):
     """
-    def recurse_inator(path: Path, parts: list[str]):
-        for file in path.glob("*"):
-            if file.is_file():
-                yield {
-                    "domain": parts[0] if len(parts) > 0 else None,
-                    "subject": parts[1] if len(parts) > 1 else None,
-                    "topic": parts[2] if len(parts) > 2 else None,
-                    "subtopic": parts[3] if len(parts) > 3 else None,
-                    "filepath": file,
-                    "filename": file.name,
-                    "filestem": file.stem,
-                    "file-ext": file.suffix,
-                }
-            elif file.is_dir() and len(parts) < max_depth:
-                yield from recurse_inator(file, parts + [file.name])
+        walk the through knowledgebase_dir, identify files at
+        domain/subject/topic/subtopic depth
+        built on os.scandir so entry types come from the directory listing,
+        and directories are listed in parallel; order is not stable
+        suffixes (lowercase, e.g (".pdf",)) skips everything else early
+    """
+    def scan_inator(directory: str, parts: list[str]):
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stem, ext = os.path.splitext(entry.name)
+                            if suffixes is not None and ext.lower() not in suffixes:
+                                continue
+                            stat = entry.stat()
+                            files.append({
+                                "domain": parts[0] if len(parts) > 0 else None,
+                                "subject": parts[1] if len(parts) > 1 else None,
+                                "topic": parts[2] if len(parts) > 2 else None,
+                                "subtopic": parts[3] if len(parts) > 3 else None,
+                                "filepath": Path(entry.path),
+                                "filename": entry.name,
+                                "filestem": stem,
+                                "file-ext": ext,
+                                "size": stat.st_size,
+                                "mtime": stat.st_mtime,
+                            })
+                        elif entry.is_dir() and len(parts) < max_depth:
+                            subdirs.append((entry.path, parts + [entry.name]))
+                    except OSError:
+                        # vanished mid walk, or unreadable
+                        continue
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            pass
+        return files, subdirs
+
+    if workers <= 1:
+        stack = [(str(root), [])]
+        while stack:
+            files, subdirs = scan_inator(*stack.pop())
+            stack.extend(subdirs)
+            yield from files
+        return
+
+    # listings land on a queue as they finish, each one queues its subdirectories
+    listed: queue.SimpleQueue = queue.SimpleQueue()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(scan_inator, str(root), [])]
+        futures[0].add_done_callback(listed.put)
+        outstanding = 1
+        try:
+            while outstanding:
+                files, subdirs = listed.get().result()
+                outstanding -= 1
+                for directory, parts in subdirs:
+                    future = pool.submit(scan_inator, directory, parts)
+                    future.add_done_callback(listed.put)
+                    outstanding += 1
+                yield from files
+        finally:
+            # consumer stopped early, don't list the rest
+            pool.shutdown(wait=False, cancel_futures=True)
 
-    yield from recurse_inator(root, [])
 
+class WalkSnapshotInator:
+    """
+    (path, size, mtime) of the files under root a caller has finished with,
+    kept on disk so the next walk only hands back what changed
+        diff_inator()    walk and split into changed / deleted
+        record_inator()  mark a file done, save_inator() persists
+    """
 
-UUID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+    def __init__(self, name: str, root: Path):
+        self.root = Path(root)
+        self.SNAPSHOT_PATH = path.get_kb_dir() / "cache" / "walks" / f"{name}.json"
+        self.SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        try:
+            self._entries: dict[str, list] = json.loads(self.SNAPSHOT_PATH.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
 
-def knowledgebase_index_inator(root: Path):
-    domains, subjects, topics, subtopics = set(), set(), set(), set()
-    available_files = []
+    def diff_inator(self, max_depth: int = 4, suffixes: tuple[str, ...] | None = None) -> dict:
+        """
+            {"changed": [walker info], "deleted": [path], "unchanged": [walker info]}
+            changed covers new files too
+        """
+        result = {"changed": [], "deleted": [], "unchanged": []}
+        seen = set()
+        for info in file_walker_inator(self.root, max_depth=max_depth, suffixes=suffixes):
+            key = str(info["filepath"])
+            seen.add(key)
+            if self._entries.get(key) == [info["size"], info["mtime"]]:
+                result["unchanged"].append(info)
+            else:
+                result["changed"].append(info)
 
-    for info in file_walker_inator(root):
-        # skip if any part is a UUID
-        skip = False
-        for part in [info["domain"], info["subject"], info["topic"], info["subtopic"]]:
-            if part and UUID_PATTERN.fullmatch(part):
-                skip = True
-                break
-        if skip:
-            continue
+        with self._lock:
+            result["deleted"] = [key for key in self._entries if key not in seen]
+            for key in result["deleted"]:
+                del self._entries[key]
+        return result
 
-        available_files.append(info["filestem"])
-        if info["domain"]: domains.add(info["domain"])
-        if info["subject"]: subjects.add(info["subject"])
-        if info["topic"]: topics.add(info["topic"])
-        if info["subtopic"]: subtopics.add(info["subtopic"])
+    def record_inator(self, info: dict):
+        """file is done at its current size and mtime"""
+        with self._lock:
+            self._entries[str(info["filepath"])] = [info["size"], info["mtime"]]
 
-    return {
-        "domains": sorted(domains),
-        "subjects": sorted(subjects),
-        "topics": sorted(topics),
-        "subtopics": sorted(subtopics),
-    }, available_files
+    def save_inator(self):
+        with self._lock:
+            data = json.dumps(self._entries)
+        partial = self.SNAPSHOT_PATH.with_suffix(".partial")
+        partial.write_text(data)
+        partial.replace(self.SNAPSHOT_PATH)
 
 
 class FileRegisterInator():
+    # registry is keyed on file contents, size + mtime let unchanged files skip rehashing
+    HASH_BLOCK_SIZE = 1024 * 1024
+    COLUMNS = [
+        "ids", "original_name", "sanitized_name", "hash_id", "source_path",
+        "markdown_path", "size", "mtime", "converted", "embedded", "last_updated"
+    ]
+
+    # columns added after the content hashed schema, appended on startup when missing
+    ADDED_COLUMNS = {
+        "markdown_size": "INTEGER",
+        "markdown_mtime": "REAL",
+        "convert_page": "INTEGER DEFAULT 0",
+        "convert_offset": "INTEGER DEFAULT 0",
+        "embedded_chunks": "INTEGER DEFAULT 0",
+        "total_chunks": "INTEGER DEFAULT 0",
+        "file_metadata": "TEXT",
+        "error": "TEXT",
+        "failed_stage": "TEXT",
+        "page_count": "INTEGER",
+        "convert_seconds": "REAL",
+        "chunk_seconds": "REAL",
+        "embed_seconds": "REAL",
+        # markdown of what a source held before it was edited in place, its chunks
+        # wait there until the new markdown is chunked and diffed against them
+        "replaced_markdown": "TEXT",
+    }
+
+    # chunk columns added later, same treatment as ADDED_COLUMNS
+    # what a file was split with, so a change in chunk size is noticed instead of silently re-chunking
+    ADDED_CHUNK_COLUMNS = {
+        "max_tokens": "INTEGER",
+        "tokenizer": "TEXT",
+    }
+
+    # per file measurements stats_inator may write
+    STAT_COLUMNS = {"page_count", "convert_seconds", "chunk_seconds", "embed_seconds"}
+
+    # seconds columns behind each stage's cost, and the bytes they are measured against
+    COST_STAGES = {
+        "convert": (("convert_seconds",), "size"),
+        "embed": (("chunk_seconds", "embed_seconds"), "markdown_size"),
+        "ingest": (("convert_seconds", "chunk_seconds", "embed_seconds"), "size"),
+    }
+    # seconds per byte assumed until the library has timings of its own, rough guesses
+    # (~0.5 MB of pdf converted and ~50 KB of markdown embedded per second)
+    DEFAULT_SECONDS_PER_BYTE = {"convert": 2e-6, "embed": 2e-5, "ingest": 3e-6}
+
+    # sqlite caps bound parameters per statement, bulk lookups go in slices
+    LOOKUP_SLICE = 500
+
+    # /process/ filters -> where clause
+    STATUS_FILTERS = {
+        "not_converted": "converted = 0",
+        "not_embedded": "embedded = 0",
+        "failed": "error IS NOT NULL",
+    }
+
+    # applied to every connection: WAL lets readers run alongside the one writer,
+    # synchronous=NORMAL only fsyncs at checkpoints (still crash safe under WAL)
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+    )
+
     def __init__(self, db_path: str = "registry/registry.db"):
         self.DB_PATH = path.get_kb_dir() / db_path
         self.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
         self._table_iniatior_inator()
 
+    def __getstate__(self):
+        # connections don't cross process boundaries, workers open their own
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """long lived connection, one per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.DB_PATH, timeout=30)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def _write_inator(self):
+        """
+            the connection for one write method: commits when the block ends,
+            rolls back if it raises, so a failed write never keeps the write lock
+            inside a batch_inator block the batch commits or rolls back instead
+        """
+        with self.batch_inator():
+            yield self._connect()
+
+    @contextmanager
+    def batch_inator(self):
+        """
+            run many registry calls as one transaction
+                with registry.batch_inator():
+                    for ...: registry.register_inator(...)
+            commits once on exit, rolls back if the block raises
+            nested blocks join the outermost one
+        """
+        conn = self._connect()
+        self._local.depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.depth -= 1
+            if not self._local.depth:
+                conn.rollback()
+            raise
+        self._local.depth -= 1
+        if not self._local.depth:
+            conn.commit()
+
+    def close_inator(self):
+        """close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
     def _table_iniatior_inator(self):
-        conn = sqlite3.connect(self.DB_PATH)
-        cursor = conn.cursor()
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
 
-        # table if none exists
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS registry (
-            id INTEGER PRIMARY KEY,
-            original_name TEXT UNIQUE,
-            sanitized_name TEXT,
-            hash_id TEXT UNIQUE,
-            converted INTEGER DEFAULT 0,
-            embedded INTEGER DEFAULT 0,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+            # registries from before content hashing keyed on the title,
+            # rebuild them so original_name is no longer unique
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(registry)")]
+            if columns and "source_path" not in columns:
+                cursor.execute("ALTER TABLE registry RENAME TO registry_legacy")
+
+            # table if none exists
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS registry (
+                id INTEGER PRIMARY KEY,
+                original_name TEXT,
+                sanitized_name TEXT,
+                hash_id TEXT UNIQUE,
+                source_path TEXT UNIQUE,
+                markdown_path TEXT,
+                size INTEGER,
+                mtime REAL,
+                converted INTEGER DEFAULT 0,
+                embedded INTEGER DEFAULT 0,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+
+            if columns and "source_path" not in columns:
+                cursor.execute("""
+                INSERT INTO registry (id, original_name, sanitized_name, hash_id, converted, embedded, last_updated)
+                SELECT id, original_name, sanitized_name, hash_id, converted, embedded, last_updated
+                FROM registry_legacy
+                """)
+                cursor.execute("DROP TABLE registry_legacy")
+
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(registry)")]
+            for column, column_type in self.ADDED_COLUMNS.items():
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE registry ADD COLUMN {column} {column_type}")
+
+            # chunk ids per markdown file, so re-ingest can diff against what is stored
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                markdown_path TEXT,
+                chunk_id TEXT,
+                vectorstore_path TEXT,
+                collection TEXT,
+                PRIMARY KEY (markdown_path, chunk_id)
+            )
+            """)
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(chunks)")]
+            for column, column_type in self.ADDED_CHUNK_COLUMNS.items():
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE chunks ADD COLUMN {column} {column_type}")
 
-        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_registry_original_name ON registry(original_name)")
-        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_registry_hash ON registry(hash_id)")
+            cursor.execute("DROP INDEX IF EXISTS idx_registry_original_name")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_registry_hash ON registry(hash_id)")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_registry_source ON registry(source_path)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_registry_markdown ON registry(markdown_path)")
 
-        conn.commit()
-        conn.close()
 
 
     def hash_inator(self, filename: str):
         """Generate a determinstic hash_id from filename"""
         return hashlib.sha256(filename.encode("utf-8")).hexdigest()
 
-    def register_inator(self, original_name:str, sanitized_name:str):
+    def file_hash_inator(self, filepath: Path) -> str:
+        """Generate a hash_id from file contents, streamed in fixed size blocks"""
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            while block := f.read(self.HASH_BLOCK_SIZE):
+                digest.update(block)
+        return digest.hexdigest()
 
-        hash_id = self.hash_inator(sanitized_name)
-        conn = sqlite3.connect(self.DB_PATH)
+    def identity_inator(self, filepath: Path) -> str:
+        """
+            content hash for filepath
+            reuses the registered hash when size and mtime are unchanged
+        """
+        stat = filepath.stat()
+        conn = self._connect()
         cursor = conn.cursor()
+        cursor.execute(
+            "SELECT hash_id, size, mtime FROM registry WHERE source_path = ?",
+            (str(filepath),)
+        )
+        row = cursor.fetchone()
 
-        cursor.execute("""
-        INSERT INTO registry (original_name, sanitized_name, hash_id)
-        VALUES (?,?, ?)
-        ON CONFLICT(hash_id) DO UPDATE SET
-            last_updated = CURRENT_TIMESTAMP
-        """, (original_name, sanitized_name, hash_id))
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            return row[0]
+        return self.file_hash_inator(filepath)
+
+    def register_inator(self, original_name:str, sanitized_name:str, filepath: Path | None = None,
+                        hash_id: str | None = None, metadata: dict | None = None):
+        """
+            register a file under its content hash
+            a known source_path with new contents takes the new hash and
+            has its converted/embedded flags reset
+            metadata (the sanitized FileMetadata) is kept so the llm is
+            only asked once per content hash
+        """
+        if filepath is None:
+            hash_id = hash_id or self.hash_inator(sanitized_name)
+            source_path, size, mtime = None, None, None
+        else:
+            hash_id = hash_id or self.file_hash_inator(filepath)
+            stat = filepath.stat()
+            source_path, size, mtime = str(filepath), stat.st_size, stat.st_mtime
+
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+
+            replaced_markdown = None
+            if source_path is not None:
+                cursor.execute(
+                    "SELECT hash_id, markdown_path, replaced_markdown FROM registry WHERE source_path = ?",
+                    (source_path,)
+                )
+                row = cursor.fetchone()
+                if row and row[0] != hash_id:
+                    # contents changed in place, drop the stale row
+                    # its markdown goes now, so the embedder can't pick it up as a file of its own,
+                    # its chunks are handed to the new row (edited twice: the ones still waiting)
+                    _, old_markdown, replaced_markdown = row
+                    replaced_markdown = replaced_markdown or old_markdown
+                    if old_markdown:
+                        Path(old_markdown).unlink(missing_ok=True)
+                        Path(old_markdown).with_suffix(".md.partial").unlink(missing_ok=True)
+                    cursor.execute("DELETE FROM registry WHERE source_path = ?", (source_path,))
+
+            file_metadata = json.dumps(metadata) if metadata else None
+            cursor.execute("""
+            INSERT INTO registry (original_name, sanitized_name, hash_id, source_path, size, mtime, file_metadata,
+                                  replaced_markdown)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(hash_id) DO UPDATE SET
+                sanitized_name = excluded.sanitized_name,
+                source_path = COALESCE(registry.source_path, excluded.source_path),
+                size = COALESCE(excluded.size, registry.size),
+                mtime = COALESCE(excluded.mtime, registry.mtime),
+                file_metadata = COALESCE(excluded.file_metadata, registry.file_metadata),
+                replaced_markdown = COALESCE(excluded.replaced_markdown, registry.replaced_markdown),
+                last_updated = CURRENT_TIMESTAMP
+            """, (original_name, sanitized_name, hash_id, source_path, size, mtime, file_metadata, replaced_markdown))
+
+
+        return hash_id
+
+    def scan_inator(self, root: Path, suffixes: tuple[str, ...] = (".pdf",), max_depth: int = 4) -> dict:
+        """
+            one pass over root, sorting files into
+                added, changed, moved, unchanged, deleted
+            only files whose size or mtime moved get rehashed;
+            moves and touched-but-identical files are fixed up in place
+        """
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT hash_id, source_path, size, mtime, converted FROM registry WHERE source_path LIKE ?",
+                (f"{root}%",)
+            )
+            known = {
+                row[1]: {"hash_id": row[0], "size": row[2], "mtime": row[3], "converted": bool(row[4])}
+                for row in cursor.fetchall()
+                if row[1].startswith(str(root)) and Path(row[1]).suffix.lower() in suffixes
+            }
+            by_hash = {row["hash_id"]: source for source, row in known.items()}
+
+            result = {"added": [], "changed": [], "moved": [], "unchanged": [], "deleted": []}
+            seen = set()
+
+            for info in file_walker_inator(root, max_depth=max_depth, suffixes=suffixes):
+                source_path = str(info["filepath"])
+                seen.add(source_path)
+                row = known.get(source_path)
+
+                if row and row["size"] == info["size"] and row["mtime"] == info["mtime"]:
+                    info.update(hash_id=row["hash_id"], converted=row["converted"])
+                    result["unchanged"].append(info)
+                    continue
+
+                info["hash_id"] = self.file_hash_inator(info["filepath"])
+
+                if row and row["hash_id"] == info["hash_id"]:
+                    # touched but identical
+                    cursor.execute(
+                        "UPDATE registry SET size = ?, mtime = ? WHERE source_path = ?",
+                        (info["size"], info["mtime"], source_path)
+                    )
+                    info["converted"] = row["converted"]
+                    result["unchanged"].append(info)
+                elif row:
+                    result["changed"].append(info)
+                elif info["hash_id"] in by_hash:
+                    result["moved"].append(info)
+                else:
+                    result["added"].append(info)
 
-        conn.commit()
-        conn.close()
+            # a moved file keeps its row, just under the new path
+            for info in result["moved"]:
+                old_path = by_hash[info["hash_id"]]
+                if old_path in seen:
+                    # same contents still at the old path, this one is a duplicate
+                    info["converted"] = known[old_path]["converted"]
+                    continue
+                cursor.execute(
+                    "UPDATE registry SET source_path = ?, size = ?, mtime = ? WHERE hash_id = ?",
+                    (str(info["filepath"]), info["size"], info["mtime"], info["hash_id"])
+                )
+                info["converted"] = known[old_path]["converted"]
+                seen.add(old_path)
 
+            result["deleted"] = [
+                {"hash_id": row["hash_id"], "source_path": source}
+                for source, row in known.items()
+                if source not in seen
+            ]
+
+        return result
+
+    def markdown_identity_inator(self, markdown_path: Path) -> str:
+        """
+            hash_id of the source file a markdown file was converted from
+            markdown with no known source (or from a title keyed registry)
+            is registered on its own contents
+        """
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT hash_id FROM registry WHERE markdown_path = ?", (str(markdown_path),))
+            row = cursor.fetchone()
+
+            if row is None:
+                # rows carried over from title keyed registries
+                legacy_hash = self.hash_inator(markdown_path.stem)
+                cursor.execute(
+                    "UPDATE registry SET markdown_path = ? WHERE hash_id = ? AND source_path IS NULL",
+                    (str(markdown_path), legacy_hash)
+                )
+                if cursor.rowcount:
+                    row = (legacy_hash,)
+
+        if row:
+            return row[0]
+
+        hash_id = self.register_inator(
+            original_name=markdown_path.stem,
+            sanitized_name=markdown_path.stem,
+            filepath=markdown_path
+        )
+        self.updater_inator(status="converted", hash_id=hash_id, markdown_path=markdown_path)
         return hash_id
 
-    def updater_inator(self, status: str , hash_id: str):
-        conn = sqlite3.connect(self.DB_PATH)
+    def updater_inator(self, status: str , hash_id: str, markdown_path: Path | None = None):
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+
+            markdown_size, markdown_mtime = None, None
+            if markdown_path is not None:
+                stat = Path(markdown_path).stat()
+                markdown_size, markdown_mtime = stat.st_size, stat.st_mtime
+
+            if status in ("converted", "embedded"):
+                cursor.execute(f"""
+                UPDATE registry
+                SET {status} = 1,
+                    markdown_path = COALESCE(?, markdown_path),
+                    markdown_size = COALESCE(?, markdown_size),
+                    markdown_mtime = COALESCE(?, markdown_mtime),
+                    error = NULL,
+                    failed_stage = NULL,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE hash_id = ?
+                """, (str(markdown_path) if markdown_path else None, markdown_size, markdown_mtime, hash_id))
+
+                print(f"[DEBUG] Updated {status} for hash_id={hash_id} → {cursor.rowcount} rows affected")
+
+
+    def cached_metadata_inator(self, hash_id: str) -> dict | None:
+        """sanitized metadata stored for this content hash, if any"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT file_metadata FROM registry WHERE hash_id = ?", (hash_id,))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def markdown_path_inator(self, hash_id: str) -> Path | None:
+        """markdown file a source was converted to, if any"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT markdown_path FROM registry WHERE hash_id = ?", (hash_id,))
+        row = cursor.fetchone()
+        return Path(row[0]) if row and row[0] else None
+
+    def replaced_markdown_inator(self, hash_id: str) -> Path | None:
+        """markdown the source held before an edit in place, while its chunks are still waiting"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT replaced_markdown FROM registry WHERE hash_id = ?", (hash_id,))
+        row = cursor.fetchone()
+        return Path(row[0]) if row and row[0] else None
+
+    def adopt_chunks_inator(self, hash_id: str, markdown_path: Path):
+        """
+            move the chunk rows of the replaced markdown onto markdown_path,
+            so the diff against the new chunks keeps whatever didn't change
+        """
+        replaced = self.replaced_markdown_inator(hash_id)
+        if replaced is None:
+            return
+        with self.batch_inator():
+            cursor = self._connect().cursor()
+            cursor.execute(
+                "UPDATE OR REPLACE chunks SET markdown_path = ? WHERE markdown_path = ?",
+                (str(markdown_path), str(replaced))
+            )
+            cursor.execute("UPDATE registry SET replaced_markdown = NULL WHERE hash_id = ?", (hash_id,))
+
+    def source_path_inator(self, hash_id: str) -> Path | None:
+        """where a registered source file lives, if anywhere"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT source_path FROM registry WHERE hash_id = ?", (hash_id,))
+        row = cursor.fetchone()
+        return Path(row[0]) if row and row[0] else None
+
+    def checkpoint_inator(self, hash_id: str, page: int, offset: int):
+        """record conversion progress: pages done and bytes of markdown written"""
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE registry SET convert_page = ?, convert_offset = ? WHERE hash_id = ?",
+                (page, offset, hash_id)
+            )
+
+    def read_checkpoint_inator(self, hash_id: str) -> tuple[int, int]:
+        """(pages done, markdown bytes written) of an unfinished conversion"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT convert_page, convert_offset FROM registry WHERE hash_id = ?", (hash_id,))
+        row = cursor.fetchone()
+        return (row[0] or 0, row[1] or 0) if row else (0, 0)
+
+    def markdown_changed_inator(self, hash_id: str, markdown_path: Path) -> bool:
+        """True when markdown_path was edited since it was last converted or embedded"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT markdown_size, markdown_mtime FROM registry WHERE hash_id = ?",
+            (hash_id,)
+        )
+        row = cursor.fetchone()
+
+        if not row or row[0] is None:
+            # never recorded (i.e embedded before chunk tracking), trust the flags
+            return False
+
+        stat = markdown_path.stat()
+        return (row[0], row[1]) != (stat.st_size, stat.st_mtime)
+
+    def chunk_ids_inator(self, markdown_path: Path | str) -> dict[str, tuple[str, str]]:
+        """chunk_id -> (vectorstore_path, collection) for every chunk stored from markdown_path"""
+        conn = self._connect()
         cursor = conn.cursor()
+        cursor.execute(
+            "SELECT chunk_id, vectorstore_path, collection FROM chunks WHERE markdown_path = ?",
+            (str(markdown_path),)
+        )
+        chunk_ids = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        return chunk_ids
+
+    def chunk_spec_inator(self, markdown_path: Path | str) -> tuple[int | None, str | None] | None:
+        """(max_tokens, tokenizer) markdown_path's stored chunks were split with, None when it has none"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT max_tokens, tokenizer FROM chunks WHERE markdown_path = ? LIMIT 1",
+            (str(markdown_path),)
+        )
+        row = cursor.fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set_chunk_spec_inator(self, markdown_path: Path | str, max_tokens: int, tokenizer: str):
+        """stamp every stored chunk of markdown_path with the split it survived"""
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE chunks SET max_tokens = ?, tokenizer = ? WHERE markdown_path = ?",
+                (max_tokens, tokenizer, str(markdown_path))
+            )
+
+    def record_chunks_inator(
+        self,
+        markdown_path: Path,
+        chunk_ids: list[str],
+        vectorstore_path: str,
+        collection: str,
+        hash_id: str | None = None,
+        embedded_chunks: int | None = None,
+        total_chunks: int | None = None,
+        max_tokens: int | None = None,
+        tokenizer: str | None = None
+    ):
+        """
+            record a batch of stored chunks, and the file's embedding progress
+            with it, in one transaction
+            called after the batch is written to the vectorstore; chunk ids are
+            upserted there, so a crash in between just re-writes that batch
+        """
+        with self.batch_inator():
+            cursor = self._connect().cursor()
+            cursor.executemany("""
+            INSERT OR REPLACE INTO chunks (markdown_path, chunk_id, vectorstore_path, collection, max_tokens, tokenizer)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, [
+                (str(markdown_path), chunk_id, vectorstore_path, collection, max_tokens, tokenizer)
+                for chunk_id in chunk_ids
+            ])
+
+            if hash_id is not None:
+                cursor.execute("""
+                UPDATE registry
+                SET embedded_chunks = COALESCE(?, embedded_chunks),
+                    total_chunks = COALESCE(?, total_chunks),
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE hash_id = ?
+                """, (embedded_chunks, total_chunks, hash_id))
 
-        if status in ("converted", "embedded"):
+    def shared_chunks_inator(self, markdown_path: Path | str, chunk_ids: list[str], vectorstore_path: str) -> set[str]:
+        """
+            the chunk_ids another markdown file also has in vectorstore_path
+            (same title, same headers, same text), their vectors must stay
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        shared = set()
+        for start in range(0, len(chunk_ids), self.LOOKUP_SLICE):
+            part = chunk_ids[start:start + self.LOOKUP_SLICE]
             cursor.execute(f"""
-            UPDATE registry
-            SET {status} = 1,
-                last_updated = CURRENT_TIMESTAMP
-            WHERE hash_id = ?
-            """, (hash_id,))
+            SELECT chunk_id FROM chunks
+            WHERE vectorstore_path = ? AND markdown_path != ? AND chunk_id IN ({",".join("?" * len(part))})
+            """, (vectorstore_path, str(markdown_path), *part))
+            shared.update(row[0] for row in cursor.fetchall())
+        return shared
 
-            print(f"[DEBUG] Updated {status} for hash_id={hash_id} → {cursor.rowcount} rows affected")
+    def drop_chunks_inator(self, markdown_path: Path | str, chunk_ids: list[str] | None = None) -> int:
+        """forget chunk ids for markdown_path (all of them if chunk_ids is None)"""
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+            if chunk_ids is None:
+                cursor.execute("DELETE FROM chunks WHERE markdown_path = ?", (str(markdown_path),))
+            else:
+                cursor.executemany(
+                    "DELETE FROM chunks WHERE markdown_path = ? AND chunk_id = ?",
+                    [(str(markdown_path), chunk_id) for chunk_id in chunk_ids]
+                )
+        count = cursor.rowcount
+        return count
+
+    def embedded_markdown_inator(self) -> set[str]:
+        """every markdown path currently marked embedded"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT markdown_path FROM registry WHERE embedded = 1 AND markdown_path IS NOT NULL")
+        return {row[0] for row in cursor.fetchall()}
 
-        conn.commit()
-        conn.close()
+    def chunked_files_inator(self) -> list[str]:
+        """
+            every markdown path that has chunks stored
+            except replaced markdown whose chunks still wait for the new markdown's embed
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT DISTINCT markdown_path FROM chunks
+        WHERE markdown_path NOT IN (
+            SELECT replaced_markdown FROM registry WHERE replaced_markdown IS NOT NULL AND embedded = 0
+        )
+        """)
+        paths = [row[0] for row in cursor.fetchall()]
+        return paths
+
+    def store_counts_inator(self) -> list[tuple[str, str, int]]:
+        """(vectorstore_path, collection, chunks) for every store with chunks recorded"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT vectorstore_path, collection, COUNT(*) FROM chunks
+        GROUP BY vectorstore_path, collection
+        """)
+        return cursor.fetchall()
+
+    def forget_inator(self, hash_id: str) -> int:
+        """remove a file from the registry (i.e it was deleted from disk)"""
+        with self._write_inator() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM registry WHERE hash_id = ?", (hash_id,))
+        count = cursor.rowcount
+        return count
 
     def check_inator(self, hash_id: str, field: str = "") -> bool:
 
@@ -168,7 +821,7 @@ class FileRegisterInator():
             Check if a file exists or if a flag is set.
         """
 
-        conn = sqlite3.connect(self.DB_PATH)
+        conn = self._connect()
         cursor = conn.cursor()
 
         if field:
@@ -177,41 +830,214 @@ class FileRegisterInator():
             cursor.execute("SELECT 1 FROM registry WHERE hash_id = ?", (hash_id,))
 
         result = cursor.fetchone()
-        conn.close()
         return bool(result and (result[0] if field else True))
 
+    def fail_inator(self, hash_id: str, stage: str, error: str):
+        """record which stage failed for a file and why, cleared by the next success"""
+        with self._write_inator() as conn:
+            conn.execute(
+                "UPDATE registry SET failed_stage = ?, error = ?, last_updated = CURRENT_TIMESTAMP WHERE hash_id = ?",
+                (stage, error[:1000], hash_id)
+            )
+
+    def stats_inator(self, hash_id: str, **stats):
+        """
+            record measurements for a file, any of
+                page_count, convert_seconds, chunk_seconds, embed_seconds
+        """
+        unknown = set(stats) - self.STAT_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown stat columns: {', '.join(sorted(unknown))}")
+        stats = {column: value for column, value in stats.items() if value is not None}
+        if not stats:
+            return
+
+        with self._write_inator() as conn:
+            conn.execute(
+                f"UPDATE registry SET {', '.join(f'{column} = ?' for column in stats)} WHERE hash_id = ?",
+                (*stats.values(), hash_id)
+            )
+
+    def throughput_inator(self, slowest: int = 5) -> dict:
+        """aggregate sizes, stage durations and rates over the whole library"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT COUNT(*), SUM(converted), SUM(embedded), SUM(error IS NOT NULL),
+               SUM(size), SUM(page_count), SUM(markdown_size), SUM(total_chunks),
+               SUM(convert_seconds), SUM(chunk_seconds), SUM(embed_seconds),
+               SUM(CASE WHEN convert_seconds IS NOT NULL THEN page_count END),
+               SUM(CASE WHEN convert_seconds IS NOT NULL THEN size END),
+               SUM(CASE WHEN embed_seconds IS NOT NULL THEN total_chunks END)
+        FROM registry
+        """)
+        (files, converted, embedded, failed, size, pages, markdown_size, chunks,
+         convert_seconds, chunk_seconds, embed_seconds, timed_pages, timed_bytes, timed_chunks) = cursor.fetchone()
+
+        cursor.execute("""
+        SELECT failed_stage, COUNT(*) FROM registry WHERE error IS NOT NULL GROUP BY failed_stage
+        """)
+        failures = {stage or "unknown": count for stage, count in cursor.fetchall()}
+
+        cursor.execute("""
+        SELECT sanitized_name, hash_id, page_count, size, total_chunks,
+               COALESCE(convert_seconds, 0) + COALESCE(chunk_seconds, 0) + COALESCE(embed_seconds, 0) AS seconds
+        FROM registry ORDER BY seconds DESC LIMIT ?
+        """, (slowest,))
+        slow = [
+            dict(zip(["sanitized_name", "hash_id", "page_count", "size", "total_chunks", "seconds"], row))
+            for row in cursor.fetchall() if row[5]
+        ]
+
+        def rate(amount, seconds):
+            return round(amount / seconds, 2) if amount and seconds else None
+
+        return {
+            "files": files,
+            "converted": converted or 0,
+            "embedded": embedded or 0,
+            "failed": failed or 0,
+            "failures_by_stage": failures,
+            "bytes": size or 0,
+            "pages": pages or 0,
+            "markdown_bytes": markdown_size or 0,
+            "chunks": chunks or 0,
+            "convert_seconds": round(convert_seconds or 0, 2),
+            "chunk_seconds": round(chunk_seconds or 0, 2),
+            "embed_seconds": round(embed_seconds or 0, 2),
+            "pages_per_sec": rate(timed_pages, convert_seconds),
+            "convert_mb_per_sec": rate((timed_bytes or 0) / 1e6, convert_seconds),
+            "chunks_per_sec": rate(timed_chunks, embed_seconds),
+            "slowest": slow,
+        }
+
+    def cost_inator(self, sizes: dict[str, int], stage: str = "convert") -> dict[str, float]:
+        """
+            estimated seconds of stage work per file, what the scheduler orders by
+            sizes is hash_id -> bytes (pdf bytes, markdown bytes for embed)
+            a file timed through the stage before costs its recorded seconds,
+            any other its bytes at the library's recorded seconds per byte
+        """
+        if stage not in self.COST_STAGES:
+            raise ValueError(f"Unknown cost stage: {stage}")
+        columns, size_column = self.COST_STAGES[stage]
+        recorded_sum = " + ".join(f"COALESCE({column}, 0)" for column in columns)
+        timed = f"{columns[0]} IS NOT NULL AND {columns[-1]} IS NOT NULL"
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        SELECT SUM({recorded_sum}), SUM({size_column}) FROM registry WHERE {timed} AND {size_column} > 0
+        """)
+        seconds, size = cursor.fetchone()
+        per_byte = seconds / size if seconds and size else self.DEFAULT_SECONDS_PER_BYTE[stage]
+
+        recorded = {}
+        unique = list(sizes)
+        for start in range(0, len(unique), self.LOOKUP_SLICE):
+            part = unique[start:start + self.LOOKUP_SLICE]
+            cursor.execute(f"""
+            SELECT hash_id, {recorded_sum} FROM registry
+            WHERE {timed} AND hash_id IN ({",".join("?" * len(part))})
+            """, part)
+            recorded.update(cursor.fetchall())
+
+        return {hash_id: recorded.get(hash_id, (size or 0) * per_byte) for hash_id, size in sizes.items()}
+
+    def status_inator(self, hash_ids: list[str]) -> dict[str, dict]:
+        """
+            status of many files in a few queries
+            hash_id -> {converted, embedded, embedded_chunks, total_chunks,
+                        error, source_path, markdown_path}
+            embedded_chunks/total_chunks is how far a (possibly interrupted) embed got
+            unregistered hashes are left out
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        statuses = {}
+        unique = list(dict.fromkeys(hash_ids))
+        for start in range(0, len(unique), self.LOOKUP_SLICE):
+            part = unique[start:start + self.LOOKUP_SLICE]
+            cursor.execute(f"""
+            SELECT hash_id, converted, embedded, embedded_chunks, total_chunks, error, source_path, markdown_path
+            FROM registry WHERE hash_id IN ({",".join("?" * len(part))})
+            """, part)
+            for (hash_id, converted, embedded, embedded_chunks, total_chunks,
+                 error, source_path, markdown_path) in cursor.fetchall():
+                statuses[hash_id] = {
+                    "converted": bool(converted),
+                    "embedded": bool(embedded),
+                    "embedded_chunks": embedded_chunks or 0,
+                    "total_chunks": total_chunks or 0,
+                    "error": error,
+                    "source_path": source_path,
+                    "markdown_path": markdown_path,
+                }
+        return statuses
+
+    def page_inator(self, cursor_id: int = 0, limit: int = 100, status: str | None = None) -> tuple[list[dict], int | None]:
+        """
+            one page of registry rows with id > cursor_id, in id order
+            status narrows it to not_converted, not_embedded or failed
+            returns (rows, next cursor), the cursor is None on the last page
+        """
+        if status is not None and status not in self.STATUS_FILTERS:
+            raise ValueError(f"Invalid status filter, use one of {', '.join(self.STATUS_FILTERS)}")
+
+        where = "id > ?"
+        if status:
+            where += f" AND {self.STATUS_FILTERS[status]}"
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        SELECT id, original_name, sanitized_name, hash_id, source_path,
+               markdown_path, size, mtime, converted, embedded, last_updated, error
+        FROM registry
+        WHERE {where}
+        ORDER BY id
+        LIMIT ?
+        """, (cursor_id, limit + 1))
+        rows = cursor.fetchall()
+
+        data = [dict(zip(self.COLUMNS + ["error"], row)) for row in rows[:limit]]
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return data, next_cursor
+
     def show_all_inator(self):
         """Print all rows in the registry table for debugging"""
-        conn = sqlite3.connect(self.DB_PATH)
+        conn = self._connect()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM registry")
+        cursor.execute("""
+        SELECT id, original_name, sanitized_name, hash_id, source_path,
+               markdown_path, size, mtime, converted, embedded, last_updated
+        FROM registry
+        """)
         rows = cursor.fetchall()
-        conn.close()
 
-        columns = ["ids", "original_name", "sanitized_name","hash_id", "converted", "embedded"]
-        data = [dict(zip(columns,row)) for row in rows]
+        data = [dict(zip(self.COLUMNS,row)) for row in rows]
         return data
 
     def reset_inator(self, status, hash_id=None):
+        """
+            clear a status flag for one file (or all of them)
+            resetting embedded also forgets the file's chunks and embed progress,
+            or the next embed would find every chunk recorded and store nothing
+        """
         VALID_COLUMNS = {"embedded", "converted"}
         
         if status not in VALID_COLUMNS:
             raise ValueError("Invalid status field")
 
-        conn = sqlite3.connect(self.DB_PATH)
-        cursor = conn.cursor()
-        try:
-            if hash_id:
+        with self.batch_inator():
+            cursor = self._connect().cursor()
+            where, params = ("WHERE hash_id = ?", (hash_id,)) if hash_id else ("", ())
+            if status == "embedded":
                 cursor.execute(f"""
-                UPDATE registry
-                SET {status} = 0
-                WHERE hash_id = ?
-                """,(hash_id))
-            else:
-                cursor.execute(f"UPDATE registry SET {status} = 0")
-            conn.commit()
-            count = cursor.rowcount
-            return count
-
-        finally:
-            conn.close()
+                DELETE FROM chunks WHERE markdown_path IN (
+                    SELECT markdown_path FROM registry {where}
+                )
+                """, params)
+                cursor.execute(f"UPDATE registry SET embedded_chunks = 0, total_chunks = 0 {where}", params)
+            cursor.execute(f"UPDATE registry SET {status} = 0 {where}", params)
+        return cursor.rowcount
@@ -1,17 +1,112 @@
+import os
+import re
 import json
+import time
 import yaml
+import hashlib
+import pymupdf
+import logging
+import tiktoken
 import pymupdf4llm
 
+from ollama import Client
 from pathlib import Path
-from langchain_chroma import Chroma
+from threading import Lock
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator
 from langchain_ollama import OllamaLLM
 from langchain_core.documents import Document
-from langchain_ollama import OllamaEmbeddings
-from langchain_text_splitters import  MarkdownHeaderTextSplitter
+from langchain_text_splitters import  MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
 
 from agents.rose import RosePrompts
 from cerebrum_core.model_inator import FileMetadata
 from cerebrum_core.file_manager_inator import CerebrumPaths
+from cerebrum_core.store_pool_inator import store_pool
+from cerebrum_core.progress_inator import progress_events
+
+logger = logging.getLogger(__name__)
+
+# pdf -> markdown runs this many pages at a time, each range is checkpointed
+CONVERT_PAGES_PER_STEP = 25
+# markdown is named <title>-<first chars of the content hash>.md
+MARKDOWN_HASH_CHARS = 12
+MARKDOWN_HASH_SUFFIX = re.compile(rf"-[0-9a-f]{{{MARKDOWN_HASH_CHARS}}}$")
+
+# embedding batches are capped by chunk count and by tokens
+EMBED_BATCH_SIZE = 64
+EMBED_BATCH_TOKENS = 16_000
+
+# chunks never exceed the embedding model's context window, nor this
+MAX_CHUNK_TOKENS = 4096
+CHUNK_OVERLAP_TOKENS = 200
+# used when the model's context window can't be looked up
+DEFAULT_CONTEXT_TOKENS = 2048
+# cl100k won't count exactly like the embedding model's own tokenizer
+CONTEXT_SAFETY_MARGIN = 0.9
+
+# token counts (and so chunk boundaries) come from this tiktoken encoding
+TOKENIZER = "cl100k_base"
+# recorded instead when the encoding couldn't be loaded, ~4 chars per token
+FALLBACK_TOKENIZER = "chars/4"
+# a failed encoding or context window lookup is tried again after this long, never cached
+LOOKUP_RETRY_SECONDS = 300
+
+_encoder = None
+_encoder_failed_at = 0.0
+_encoder_lock = Lock()
+
+# embedding model -> context length, only lookups that succeeded
+_context_windows: dict[str, int] = {}
+_context_failed_at: dict[str, float] = {}
+
+
+def _encoder_inator():
+    """
+    shared tiktoken encoder, None while the encoding can't be loaded
+    the encoding file is kept with the app data instead of tiktoken's tmp dir default,
+    so it is downloaded once per install and checked against tiktoken's pinned hash
+    """
+    global _encoder, _encoder_failed_at
+    with _encoder_lock:
+        if _encoder is None and time.time() - _encoder_failed_at >= LOOKUP_RETRY_SECONDS:
+            os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(CerebrumPaths().get_kb_dir() / "cache" / "tiktoken"))
+            try:
+                _encoder = tiktoken.get_encoding(TOKENIZER)
+            except Exception as e:
+                _encoder_failed_at = time.time()
+                logger.warning(f"tiktoken encoding unavailable, approximating token counts: {e}")
+        return _encoder
+
+
+def _token_count_inator(text: str, encoder) -> int:
+    if encoder is None:
+        return max(1, len(text) // 4)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def context_window_inator(embedding_model: str) -> int | None:
+    """context length the embedding model reports through ollama, None when it can't be read"""
+    if embedding_model in _context_windows:
+        return _context_windows[embedding_model]
+    if time.time() - _context_failed_at.get(embedding_model, 0.0) < LOOKUP_RETRY_SECONDS:
+        return None
+
+    try:
+        model_info = Client().show(embedding_model).modelinfo or {}
+    except Exception as e:
+        _context_failed_at[embedding_model] = time.time()
+        logger.warning(f"could not read context window for {embedding_model}: {e}")
+        return None
+
+    context_window = DEFAULT_CONTEXT_TOKENS
+    for key, value in model_info.items():
+        if key.endswith(".context_length"):
+            context_window = int(value)
+            break
+    _context_windows[embedding_model] = context_window
+    return context_window
 
 
 
@@ -28,6 +123,9 @@ class IngestInator:
         self.filepath = filepath
         self.embedding_model = embedding_model
         self.chunks: list[Document] = []
+        # what the last chunk_inator run split with, recorded with its chunks
+        self.max_tokens: int | None = None
+        self.tokenizer: str | None = None
 
     def _yaml_inator(self, metadata: FileMetadata) -> str:
         yaml_dump = yaml.dump(metadata.model_dump(), sort_keys=False)
@@ -55,38 +153,95 @@ class IngestInator:
         return FileMetadata(**parsed_prompt)
 
 
-    def markdown_inator(self, metadata: FileMetadata):
+    def markdown_inator(
+        self,
+        metadata: FileMetadata,
+        registry=None,
+        hash_id: str | None = None,
+        pages_per_step: int = CONVERT_PAGES_PER_STEP
+    ) -> Path:
         """
-            convert files to markdown
+            convert files to markdown, a page range at a time
+            ranges are appended to <title>-<hash>.md.partial, which is renamed to
+            <title>-<hash>.md once every page is in, so memory stays flat with page count
+            (hash is the start of hash_id, two files the llm gave the same title
+            never share a markdown file)
+            given a registry and hash_id each range is checkpointed and an
+            interrupted conversion resumes after the last completed range
+            returns the path of the written markdown file
         """
         domain = metadata.domain
         subject = metadata.subject
-        filename = metadata.title
+        filename = f"{metadata.title}-{hash_id[:MARKDOWN_HASH_CHARS]}" if hash_id else metadata.title
 
-        # add yaml front matter to the documents
-  
         path = CerebrumPaths()
         markdown_dir = path.get_kb_dir() / "markdown" / domain / subject
         markdown_dir.mkdir(parents=True, exist_ok=True)
 
-        md_body = pymupdf4llm.to_markdown(self.filepath, show_progress=True)
+        md_output = markdown_dir / f"{filename}.md"
+        md_partial = markdown_dir / f"{filename}.md.partial"
+        checkpointed = registry is not None and hash_id is not None
 
-        yaml_front = self._yaml_inator(metadata)
-        full_md = f"{yaml_front}{md_body}"
+        start_page, offset = 0, 0
+        if checkpointed and md_partial.exists():
+            start_page, offset = registry.read_checkpoint_inator(hash_id)
+        if not offset:
+            start_page = 0
 
-        md_output = markdown_dir / f"{filename}.md"
-        md_output.write_text(full_md, encoding="utf-8")
+        with pymupdf.open(self.filepath) as doc, open(md_partial, "r+b" if start_page else "wb") as out:
+            total = doc.page_count
+            progress_events.publish_inator(self.filepath.name, "convert", start_page, total, force=True)
 
+            if start_page:
+                # drop anything written after the last checkpoint
+                print(f"Resuming {self.filepath.name} at page {start_page}/{total}")
+                out.truncate(offset)
+                out.seek(offset)
+            else:
+                # add yaml front matter to the documents
+                out.write(self._yaml_inator(metadata).encode("utf-8"))
 
-    def chunk_inator(self, markdown_filepath: Path) -> list[Document]:
+            # header levels come from font sizes across the whole book,
+            # not just whichever range is being converted
+            hdr_info = pymupdf4llm.IdentifyHeaders(doc)
+
+            for first in range(start_page, total, pages_per_step):
+                last = min(first + pages_per_step, total)
+                md_body = pymupdf4llm.to_markdown(doc, pages=list(range(first, last)), hdr_info=hdr_info)
+                out.write(md_body.encode("utf-8"))
+                out.flush()
+                os.fsync(out.fileno())
+
+                if checkpointed:
+                    registry.checkpoint_inator(hash_id, page=last, offset=out.tell())
+                progress_events.publish_inator(self.filepath.name, "convert", last, total)
+
+        md_partial.replace(md_output)
+        if checkpointed:
+            registry.checkpoint_inator(hash_id, page=0, offset=0)
+        return md_output
+
+    def chunk_inator(
+        self,
+        markdown_filepath: Path,
+        max_tokens: int | None = None,
+        overlap_tokens: int = CHUNK_OVERLAP_TOKENS
+    ) -> list[Document]:
         """
         input markdown files
         split md according at header_levels
+        then split any section longer than max_tokens, with overlap
+        header metadata is kept on every sub-chunk
         """
-        # TODO: work on chunking, 
-        # dynamic chunking -> auto adjust to embedding models context window
-        # or manual chunking ->  4k tokens (find a normalized and fair tokenizer)
         md_text = markdown_filepath.read_text()
+        max_tokens = max_tokens or self.chunk_size_inator()
+        # one encoder for the whole file, even if tiktoken comes back mid-run
+        encoder = _encoder_inator()
+        self.max_tokens = max_tokens
+        self.tokenizer = TOKENIZER if encoder is not None else FALLBACK_TOKENIZER
+
+        def token_inator(text: str) -> int:
+            return _token_count_inator(text, encoder)
 
         header_levels = [
             ("#", "Header 1"),
@@ -101,36 +256,220 @@ class IngestInator:
             headers_to_split_on=header_levels,
             strip_headers=False
         )
+        token_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max_tokens,
+            chunk_overlap=min(overlap_tokens, max_tokens // 2),
+            length_function=token_inator
+        )
+
+        self.chunks = []
+        for section in splitter.split_text(md_text):
+            section_tokens = token_inator(section.page_content)
+            if section_tokens <= max_tokens:
+                section.metadata["tokens"] = section_tokens
+                self.chunks.append(section)
+                continue
 
-        self.chunks = splitter.split_text(md_text)
+            for sub_chunk in token_splitter.split_documents([section]):
+                sub_chunk.metadata["tokens"] = token_inator(sub_chunk.page_content)
+                self.chunks.append(sub_chunk)
+
+        self._chunk_id_inator(markdown_filepath, self.chunks)
         return self.chunks
 
-    def embedd_inator(self, chunk, collection_name) -> None:
+    def chunk_size_inator(self, fallback: int | None = None) -> int:
+        """
+        max chunk tokens: the embedding model's context window, capped at MAX_CHUNK_TOKENS
+        when the window can't be read, fallback (what the file was chunked with last time)
+        is kept rather than re-chunking everything at DEFAULT_CONTEXT_TOKENS
+        """
+        if self.embedding_model is None:
+            return MAX_CHUNK_TOKENS
+        context_window = context_window_inator(self.embedding_model)
+        if context_window is None:
+            if fallback:
+                return fallback
+            context_window = DEFAULT_CONTEXT_TOKENS
+        return max(1, min(int(context_window * CONTEXT_SAFETY_MARGIN), MAX_CHUNK_TOKENS))
+
+    def _chunk_id_inator(self, markdown_filepath: Path, chunks: list[Document]) -> None:
+        """
+        stable chunk ids: file name + header path + content
+        the content hash suffix is left out of the name, it changes with every edit
+        of the source and would change every id along with it
+        identical chunks under the same headers are told apart by occurrence
+        """
+        name = MARKDOWN_HASH_SUFFIX.sub("", markdown_filepath.stem) + markdown_filepath.suffix
+        seen: dict[str, int] = {}
+        for chunk in chunks:
+            header_path = " > ".join(
+                chunk.metadata[key] for key in sorted(chunk.metadata) if key.startswith("Header ")
+            )
+            key = f"{name}\x00{header_path}\x00{chunk.page_content}"
+            occurrence = seen.get(key, 0)
+            seen[key] = occurrence + 1
+
+            chunk.metadata["header_path"] = header_path
+            chunk.metadata["chunk_id"] = hashlib.sha256(f"{key}\x00{occurrence}".encode("utf-8")).hexdigest()
+
+    def batch_inator(
+        self,
+        chunks: list[Document],
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_batch_tokens: int = EMBED_BATCH_TOKENS
+    ) -> Iterator[list[Document]]:
+        """
+        group chunks into embedding batches
+        a batch closes when it hits batch_size chunks or max_batch_tokens
+        a single oversized chunk still gets a batch of its own
+        """
+        batch: list[Document] = []
+        batch_tokens = 0
+
+        for chunk in chunks:
+            chunk_tokens = chunk.metadata.get("tokens") or self.token_inator(chunk.page_content)
+            if batch and (len(batch) >= batch_size or batch_tokens + chunk_tokens > max_batch_tokens):
+                yield batch
+                batch, batch_tokens = [], 0
+
+            batch.append(chunk)
+            batch_tokens += chunk_tokens
+
+        if batch:
+            yield batch
+
+    def embedd_inator(self, chunks: Document | list[Document], collection_name) -> int:
         """
         store chunks in vectorstores
+        takes a single chunk or a whole batch, a batch is embedded in one call
         """
         assert self.embedding_model is not None, "embedding_model is required"
         assert self.vectorstores_path is not None, "vectorstores_path is required"
 
-        # embedding
+        if isinstance(chunks, Document):
+            chunks = [chunks]
+        if not chunks:
+            return 0
+
         # WARN: look into making this framework agnostic
         # (split it into a seperate embedding funcion)
-        embedding_llm = OllamaEmbeddings(model=self.embedding_model)
-        chromadb = Chroma(
-            collection_name=collection_name,
+        with store_pool.lease_inator(
             persist_directory=str(self.vectorstores_path),
-            embedding_function=embedding_llm
-        )
+            collection_name=collection_name,
+            embedding_model=self.embedding_model
+        ) as chromadb:
+            # chunk ids from chunk_inator, so re-ingest overwrites instead of duplicating
+            ids = [chunk.metadata.get("chunk_id") for chunk in chunks]
+            if all(ids):
+                chromadb.add_documents(chunks, ids=ids)
+            else:
+                chromadb.add_documents(chunks)
+        return len(chunks)
+
+    def unembedd_inator(self, chunk_ids: list[str], collection_name: str) -> int:
+        """
+        remove chunks from vectorstores by chunk id
+        """
+        assert self.embedding_model is not None, "embedding_model is required"
+        assert self.vectorstores_path is not None, "vectorstores_path is required"
 
-        # add legible chunk ids for each documents
-        # probably in a style that matches filemeta data
-        # 
-        chromadb.add_documents([chunk])
+        if not chunk_ids:
+            return 0
+
+        with store_pool.lease_inator(
+            persist_directory=str(self.vectorstores_path),
+            collection_name=collection_name,
+            embedding_model=self.embedding_model
+        ) as chromadb:
+            chromadb.delete(ids=chunk_ids)
+        return len(chunk_ids)
 
     # WARN: for later if chroma stores are too big
     def index_inator(self):
         pass
 
 
-    def token_inator(self):
-        pass
+    @staticmethod
+    def token_inator(text: str) -> int:
+        """
+        count tokens with a fast local tokenizer (tiktoken cl100k)
+        model agnostic, so treat it as an estimate for the embedding model
+        """
+        return _token_count_inator(text, _encoder_inator())
+
+
+
+def markdown_worker_inator(filepath: str, metadata: dict, registry=None, hash_id: str | None = None) -> dict:
+    """
+        process pool entry point: convert one pdf to markdown
+        only the output path and stats go back to the parent,
+        the markdown itself never crosses the process boundary
+        (page checkpoints are the one registry write made from the worker)
+    """
+    start = time.perf_counter()
+
+    with pymupdf.open(filepath) as pdf:
+        page_count = pdf.page_count
+
+    md_output = IngestInator(filepath=Path(filepath)).markdown_inator(
+        FileMetadata(**metadata),
+        registry=registry,
+        hash_id=hash_id
+    )
+
+    return {
+        "filepath": filepath,
+        "markdown_path": str(md_output),
+        "pages": page_count,
+        "markdown_bytes": md_output.stat().st_size,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+class ConvertPoolInator:
+    """
+    process pool shared by every thread of a convert stage
+    a pdf that crashes its worker breaks the pool, so the pool is rebuilt
+    and whatever was in flight gets one more try before it fails
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._pool: ProcessPoolExecutor | None = None
+        self._generation = 0
+        self._lock = Lock()
+
+    def _pool_inator(self) -> tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+            return self._pool, self._generation
+
+    def convert_inator(self, filepath: Path, metadata: dict, registry=None, hash_id: str | None = None) -> dict:
+        """convert one pdf in the pool, returns markdown_worker_inator's stats"""
+        for attempt in range(2):
+            pool, generation = self._pool_inator()
+            try:
+                return pool.submit(markdown_worker_inator, str(filepath), metadata, registry, hash_id).result()
+            except BrokenProcessPool:
+                with self._lock:
+                    # only the first thread to notice replaces the pool
+                    if self._generation == generation and self._pool is not None:
+                        self._pool.shutdown(wait=False, cancel_futures=True)
+                        self._pool = None
+                        self._generation += 1
+                if attempt:
+                    raise
+        raise RuntimeError("unreachable")
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> "ConvertPoolInator":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
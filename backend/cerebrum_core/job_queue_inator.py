@@ -0,0 +1,273 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Callable
+
+from cerebrum_core.file_manager_inator import CerebrumPaths
+
+logger = logging.getLogger(__name__)
+
+# lower runs first, uploads go ahead of bulk re-ingest
+PRIORITY_UPLOAD = 0
+PRIORITY_BULK = 10
+
+JOB_STATES = ("queued", "running", "done", "failed")
+
+
+class JobQueueInator:
+    """
+    durable ingest job queue, backed by sqlite next to the registry
+        jobs are claimed per stage, highest priority (lowest number) first,
+        then cheapest first (cost ~ estimated seconds, see FileRegisterInator.cost_inator), so within a priority
+        short jobs don't wait behind long ones
+        a job with the same dedup_key as a queued/running one is not added again
+        jobs left running by a dead server are requeued on startup
+    """
+    COLUMNS = [
+        "id", "stage", "kind", "dedup_key", "payload", "priority", "state",
+        "progress", "total", "error", "created_at", "started_at", "finished_at", "stages", "cost"
+    ]
+    # columns added after the first release, ALTERed into older databases
+    ADDED_COLUMNS = {
+        "stages": "TEXT",
+        "cost": "REAL DEFAULT 0",
+    }
+
+    def __init__(self, db_path: str = "registry/jobs.db"):
+        self.DB_PATH = CerebrumPaths().get_kb_dir() / db_path
+        self.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        self._table_iniatior_inator()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.DB_PATH, timeout=30)
+
+    def _table_iniatior_inator(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY,
+            stage TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            dedup_key TEXT,
+            payload TEXT,
+            priority INTEGER DEFAULT 10,
+            state TEXT DEFAULT 'queued',
+            progress INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            error TEXT,
+            created_at REAL,
+            started_at REAL,
+            finished_at REAL
+        )
+        """)
+        cursor.execute("PRAGMA table_info(jobs)")
+        columns = {row[1] for row in cursor.fetchall()}
+        for column, column_type in self.ADDED_COLUMNS.items():
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+
+        # one live job per dedup key
+        cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_live_dedup
+        ON jobs(dedup_key) WHERE state IN ('queued', 'running')
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_jobs_claim")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim_cost ON jobs(stage, state, priority, cost, id)")
+        conn.commit()
+        conn.close()
+
+    def _row_inator(self, row) -> dict:
+        job = dict(zip(self.COLUMNS, row))
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["stages"] = json.loads(job["stages"]) if job["stages"] else None
+        return job
+
+    def enqueue_inator(self, stage: str, kind: str, payload: dict, priority: int = PRIORITY_BULK,
+                       dedup_key: str | None = None, cost: float = 0) -> tuple[int, bool]:
+        """
+            add a job, returns (job_id, created)
+            if a live job already holds dedup_key its id comes back with created=False
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            while True:
+                try:
+                    cursor.execute("""
+                    INSERT INTO jobs (stage, kind, dedup_key, payload, priority, cost, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, (stage, kind, dedup_key, json.dumps(payload), priority, cost, time.time()))
+                    conn.commit()
+                    return cursor.lastrowid, True
+                except sqlite3.IntegrityError:
+                    cursor.execute(
+                        "SELECT id FROM jobs WHERE dedup_key = ? AND state IN ('queued', 'running')",
+                        (dedup_key,)
+                    )
+                    row = cursor.fetchone()
+                    if row:
+                        return row[0], False
+                    # the live job finished between the insert and the lookup, insert again
+        finally:
+            conn.close()
+
+    def claim_inator(self, stage: str) -> dict | None:
+        """atomically take the next queued job for stage"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        UPDATE jobs SET state = 'running', started_at = ?
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE stage = ? AND state = 'queued'
+            ORDER BY priority, cost, id
+            LIMIT 1
+        )
+        RETURNING {", ".join(self.COLUMNS)}
+        """, (time.time(), stage))
+        row = cursor.fetchone()
+        conn.commit()
+        conn.close()
+        return self._row_inator(row) if row else None
+
+    def progress_inator(self, job_id: int, progress: int, total: int, stages: list[dict] | None = None):
+        """stages: per-stage queue depth and throughput, for pipelined jobs"""
+        conn = self._connect()
+        if stages is None:
+            conn.execute("UPDATE jobs SET progress = ?, total = ? WHERE id = ?", (progress, total, job_id))
+        else:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, total = ?, stages = ? WHERE id = ?",
+                (progress, total, json.dumps(stages), job_id)
+            )
+        conn.commit()
+        conn.close()
+
+    def finish_inator(self, job_id: int, error: str | None = None):
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE id = ?",
+            ("failed" if error else "done", error, time.time(), job_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def recover_inator(self) -> int:
+        """requeue jobs a previous server left running"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE jobs SET state = 'queued', started_at = NULL WHERE state = 'running'")
+        conn.commit()
+        count = cursor.rowcount
+        conn.close()
+        return count
+
+    def restage_inator(self, stage: str, kind: str, new_stage: str, new_kind: str) -> int:
+        """move live jobs queued under an old (stage, kind) to where its handler lives now"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE jobs SET stage = ?, kind = ? WHERE stage = ? AND kind = ? AND state IN ('queued', 'running')",
+            (new_stage, new_kind, stage, kind)
+        )
+        conn.commit()
+        count = cursor.rowcount
+        conn.close()
+        return count
+
+    def job_inator(self, job_id: int) -> dict | None:
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return self._throughput_inator(self._row_inator(row)) if row else None
+
+    def jobs_inator(self, state: str | None = None, limit: int = 100) -> list[dict]:
+        conn = self._connect()
+        cursor = conn.cursor()
+        if state:
+            cursor.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE state = ? ORDER BY id DESC LIMIT ?",
+                (state, limit)
+            )
+        else:
+            cursor.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        rows = cursor.fetchall()
+        conn.close()
+        return [self._throughput_inator(self._row_inator(row)) for row in rows]
+
+    @staticmethod
+    def _throughput_inator(job: dict) -> dict:
+        """elapsed seconds and items/sec for a started job"""
+        if job["started_at"]:
+            end = job["finished_at"] or time.time()
+            elapsed = max(end - job["started_at"], 1e-6)
+            job["elapsed"] = round(elapsed, 2)
+            job["items_per_sec"] = round(job["progress"] / elapsed, 2)
+        return job
+
+
+class IngestWorkerInator:
+    """
+    fixed size worker pool per stage, pulling from a JobQueueInator
+    handlers map (stage, kind) -> fn(job, report) where report(progress, total, stages=None)
+    """
+
+    def __init__(self, queue: JobQueueInator, handlers: dict[tuple[str, str], Callable],
+                 workers: dict[str, int], poll_interval: float = 1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> "IngestWorkerInator":
+        requeued = self.queue.recover_inator()
+        if requeued:
+            logger.info(f"requeued {requeued} interrupted jobs")
+
+        for stage, count in self.workers.items():
+            for n in range(count):
+                thread = threading.Thread(target=self._loop, args=(stage,), name=f"ingest-{stage}-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def wake(self):
+        """nudge idle workers after enqueueing, instead of waiting out the poll"""
+        self._wake.set()
+
+    def _loop(self, stage: str):
+        while not self._stop.is_set():
+            job = self.queue.claim_inator(stage)
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            handler = self.handlers.get((stage, job["kind"]))
+            if handler is None:
+                self.queue.finish_inator(job["id"], error=f"no handler for {stage}/{job['kind']}")
+                continue
+
+            def report(progress: int, total: int, stages: list[dict] | None = None, job_id: int = job["id"]):
+                self.queue.progress_inator(job_id, progress, total, stages)
+
+            try:
+                handler(job, report)
+                self.queue.finish_inator(job["id"])
+            except Exception as e:
+                logger.exception(f"job {job['id']} ({stage}/{job['kind']}) failed")
+                self.queue.finish_inator(job["id"], error=str(e))
@@ -20,6 +20,10 @@ class Subject(BaseModel):
     name: str
     description: str
     topics: List[Topic] = []
+    # the vectorstore holding this subject and how many chunks it has,
+    # chunk_count is None for stores found on disk but not in the registry
+    store_path: Optional[str] = None
+    chunk_count: Optional[int] = 0
     
     def add_topic(self, topic_name: str, description: str):
         topic = Topic(name=topic_name, description=description)
@@ -36,6 +40,9 @@ class Domain(BaseModel):
         self.subjects.append(subject)
         return subject
 
+    def get_subject(self, subject_name: str):
+        return next((subject for subject in self.subjects if subject.name == subject_name), None)
+
 class KnowledgeBase(BaseModel):
     name: str
     description: str
@@ -45,6 +52,9 @@ class KnowledgeBase(BaseModel):
         domain = Domain(name=domain_name, description=description) 
         self.domains.append(domain)
         return domain
+
+    def get_domain(self, domain_name: str):
+        return next((domain for domain in self.domains if domain.name == domain_name), None)
 #############################################################################
 #                                                                           #
 #                        USER CONFIG MODELS                                 #
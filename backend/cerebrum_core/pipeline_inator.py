@@ -0,0 +1,144 @@
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# end of input marker passed down the stage queues
+_DONE = object()
+
+
+class StageInator:
+    """
+    one pipeline stage: `workers` threads pulling from a bounded inbox
+    fn(item) returns the item for the next stage, or None to drop it (already done, skipped)
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1, queue_size: int = 4):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.done = 0
+        self.dropped = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def stats_inator(self, elapsed: float) -> dict:
+        with self._lock:
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "queue_depth": self.inbox.qsize(),
+                "in_flight": self.in_flight,
+                "done": self.done,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "items_per_sec": round(self.done / elapsed, 2) if elapsed > 0 else 0.0,
+                # share of worker time spent busy, the bottleneck sits near 1.0
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed > 0 else 0.0,
+            }
+
+
+class PipelineInator:
+    """
+    staged producer/consumer pipeline
+        stages are connected by bounded queues, so a slow stage backs up
+        the ones before it instead of piling work up in memory
+        every stage has its own worker count, so stage N+1 works on one item
+        while stage N is already on the next
+    """
+
+    def __init__(self, stages: list[tuple[str, Callable[[Any], Any], int]], queue_size: int = 4):
+        self.stages = [StageInator(name, fn, workers, queue_size) for name, fn, workers in stages]
+        self.started = 0.0
+        self.finished = 0.0
+
+    def run(self, items: Iterable, on_stats: Callable[[list[dict]], None] | None = None,
+            stats_interval: float = 1.0) -> list[dict]:
+        """feed items through every stage, returns the final per-stage stats"""
+        self.started = time.perf_counter()
+        threads = []
+        for idx, stage in enumerate(self.stages):
+            next_stage = self.stages[idx + 1] if idx + 1 < len(self.stages) else None
+            remaining = [stage.workers]
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker_inator, args=(stage, next_stage, remaining),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        stop = threading.Event()
+        reporter = None
+        if on_stats:
+            def report_loop():
+                while not stop.wait(stats_interval):
+                    on_stats(self.stats_inator())
+            reporter = threading.Thread(target=report_loop, name="pipeline-stats", daemon=True)
+            reporter.start()
+
+        # blocks while the first stage is full, that is the backpressure
+        for item in items:
+            self.stages[0].inbox.put(item)
+        for _ in range(self.stages[0].workers):
+            self.stages[0].inbox.put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        self.finished = time.perf_counter()
+
+        stop.set()
+        if reporter:
+            reporter.join()
+
+        stats = self.stats_inator()
+        if on_stats:
+            on_stats(stats)
+        return stats
+
+    def _worker_inator(self, stage: StageInator, next_stage: StageInator | None, remaining: list[int]):
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                break
+
+            with stage._lock:
+                stage.in_flight += 1
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item)
+                outcome = "done" if result is not None else "dropped"
+            except Exception:
+                logger.exception(f"pipeline stage {stage.name} failed")
+                result, outcome = None, "failed"
+
+            with stage._lock:
+                stage.in_flight -= 1
+                stage.busy_seconds += time.perf_counter() - start
+                setattr(stage, outcome, getattr(stage, outcome) + 1)
+
+            if result is not None and next_stage is not None:
+                next_stage.inbox.put(result)
+
+        # the last worker out closes the next stage
+        with stage._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.inbox.put(_DONE)
+
+    def finished_inator(self) -> int:
+        """items that left the pipeline, whether completed, dropped or failed"""
+        return self.stages[-1].done + sum(stage.dropped + stage.failed for stage in self.stages)
+
+    def stats_inator(self) -> list[dict]:
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started else 0.0
+        return [stage.stats_inator(elapsed) for stage in self.stages]
@@ -0,0 +1,99 @@
+import time
+import asyncio
+import threading
+from collections import deque
+
+# at most one event per (file, stage) this often, first and last always go out
+PROGRESS_MIN_INTERVAL = 0.5
+# recent events kept for clients reconnecting with Last-Event-ID
+PROGRESS_HISTORY = 500
+# events buffered per subscriber before a slow client starts missing some
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class ProgressInator:
+    """
+    structured ingest progress, published from worker threads
+    and fanned out to asyncio subscribers (the /process/events stream)
+        an event is {id, file, stage, index, total, rate, eta, time}
+        rate is units (pages, chunks) per second since the file entered the stage
+    """
+
+    def __init__(self, min_interval: float = PROGRESS_MIN_INTERVAL, history: int = PROGRESS_HISTORY):
+        self.min_interval = min_interval
+        self.history: deque[dict] = deque(maxlen=history)
+        self._seq = 0
+        self._started: dict[tuple[str, str], tuple[float, int]] = {}
+        self._last_sent: dict[tuple[str, str], float] = {}
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def publish_inator(self, file: str, stage: str, index: int, total: int, force: bool = False) -> dict | None:
+        """record progress, returns the event or None when rate limited"""
+        key = (file, stage)
+        now = time.time()
+
+        with self._lock:
+            if key not in self._started or index < self._started[key][1]:
+                self._started[key] = (now, index)
+            started, first_index = self._started[key]
+
+            finished = total and index >= total
+            last = self._last_sent.get(key)
+            if not (force or finished or last is None or now - last >= self.min_interval):
+                return None
+
+            elapsed = now - started
+            rate = (index - first_index) / elapsed if elapsed > 0 else 0.0
+            eta = (total - index) / rate if rate > 0 and total else None
+
+            self._seq += 1
+            event = {
+                "id": self._seq,
+                "file": file,
+                "stage": stage,
+                "index": index,
+                "total": total,
+                "rate": round(rate, 2),
+                "eta": round(eta, 1) if eta is not None else None,
+                "time": now,
+            }
+            self.history.append(event)
+
+            if finished:
+                self._started.pop(key, None)
+                self._last_sent.pop(key, None)
+            else:
+                self._last_sent[key] = now
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver_inator, queue, event)
+            except RuntimeError:
+                # loop already closed, the subscriber is gone
+                pass
+        return event
+
+    @staticmethod
+    def _deliver_inator(queue: asyncio.Queue, event: dict):
+        if not queue.full():
+            queue.put_nowait(event)
+
+    def subscribe_inator(self, last_id: int = 0) -> asyncio.Queue:
+        """queue of events for the running loop, preloaded with history after last_id"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            for event in self.history:
+                if event["id"] > last_id and not queue.full():
+                    queue.put_nowait(event)
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe_inator(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = {sub for sub in self._subscribers if sub[1] is not queue}
+
+
+# one bus for the whole app, ingest code publishes here
+progress_events = ProgressInator()
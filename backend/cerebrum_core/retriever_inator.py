@@ -1,15 +1,20 @@
 import json
+import time
+import asyncio
 import logging
 
 import os
 from pathlib import Path
-from langchain_chroma import Chroma
+from threading import Lock
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from langchain_ollama import OllamaLLM
-from langchain_ollama import OllamaEmbeddings
 
 from agents.rose import RosePrompts
 from cerebrum_core.model_inator import TranslatedQuery
-from cerebrum_core.file_manager_inator import CerebrumPaths, knowledgebase_index_inator
+from cerebrum_core.file_manager_inator import CerebrumPaths
+from cerebrum_core.taxonomy_inator import TaxonomyInator, shared_taxonomy_inator
+from cerebrum_core.store_pool_inator import store_pool
+from cerebrum_core.ingest_inator import IngestInator
 
 
 os.makedirs("./logs", exist_ok=True)
@@ -24,26 +29,69 @@ logging.basicConfig(
 logger = logging.getLogger("cerebrum")
 vector_path = CerebrumPaths()
 
+# threads for chroma searches off the event loop, the most that run at once
+RETRIEVE_WORKERS = 4
+# routes of one query searched at once, and how long one may take before it is dropped
+ROUTE_CONCURRENCY = 4
+ROUTE_TIMEOUT = 10.0
+# how retrieved chunks are condensed before the answer prompt
+#   concurrent  one summary call per chunk, SUMMARY_CONCURRENCY at a time
+#   batched     one call summarizing every chunk together
+#   raw         no summaries, chunk text as is up to RAW_CONTEXT_TOKENS
+COMPRESSION_MODES = ("concurrent", "batched", "raw")
+COMPRESSION_MODE = "concurrent"
+SUMMARY_CONCURRENCY = 4
+RAW_CONTEXT_TOKENS = 2000
+
+
+class QueryStateInator:
+    """
+    everything one chat request builds up on its way through the retriever,
+    kept off the RetrieverInator so one retriever serves concurrent chats
+    """
+
+    def __init__(self, user_query: str) -> None:
+        self.user_query = user_query
+        self.translated_query: TranslatedQuery | None = None
+        self.constructed_query: dict = {"routes": []}
+        self.results: list = []
+        self.response: str | None = None
+        # seconds per step, and the compression mode used
+        self.timings: dict = {}
+
 
 class RetrieverInator:
     """
     Loads chroma dbs into memory
     retrieves relevant info for rag query
     grades retrieved data on relevance to query
+        built once per app (app.state.retriever), so the model clients and
+        their http connections are reused; per request state lives in QueryStateInator
     """
 
-    def __init__(self, vectorstores_root: str, embedding_model: str, llm_model: str) -> None:
+    def __init__(self, vectorstores_root: str, embedding_model: str, llm_model: str,
+                 taxonomy: TaxonomyInator | None = None, route_concurrency: int = ROUTE_CONCURRENCY,
+                 route_timeout: float = ROUTE_TIMEOUT, compression: str = COMPRESSION_MODE) -> None:
         self.vectorstores_root = vectorstores_root
-        self.embedding_model = OllamaEmbeddings(model=embedding_model)
+        self.compression = self._mode_inator(compression)
+        self.route_concurrency = max(1, route_concurrency)
+        self.route_timeout = route_timeout
+        # real domain/subject stores, kept current by ingest
+        self.taxonomy = taxonomy or shared_taxonomy_inator(Path(vectorstores_root))
+        # shared with ingest, so repeated queries hit the embedding cache
+        self.embedding_model_name = embedding_model
+        self.embedding_model = store_pool.embedding_inator(embedding_model)
         self.llm_model = OllamaLLM(model=llm_model) 
-        self.constructed_query = {}
-        self.all_results = []
+        # the async chat path runs blocking store searches here, bounded
+        self.executor = ThreadPoolExecutor(max_workers=RETRIEVE_WORKERS, thread_name_prefix="retrieve")
+        # store path -> searches that timed out but still hold an executor thread
+        self._hung: dict[str, int] = {}
+        self._hung_lock = Lock()
 
-    def translator_inator(self, user_query: str):
-        """
-             translates user input into vectorstore queries
-        """
+    def close_inator(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
+    def _translation_prompt_inator(self, user_query: str) -> str:
         # WARN: look into question(query) specific translation
         #       match each subquery to its relevant domain/subject
         #       step back / rewrite / sub-question / HyDE
@@ -52,13 +100,17 @@ class RetrieverInator:
         if not translation_prompt:
             raise ValueError("Prompt 'rose_query_translator' not found in RosePrompts")
 
-        available_stores = knowledgebase_index_inator(Path(self.vectorstores_root))
+        # only pairs that have a store, as {domain: [subjects]}
+        available_stores = self.taxonomy.prompt_inator()
 
         filled_prompt = translation_prompt.format(
             user_query=user_query,
             available_stores=available_stores
         )
-        translated_query = self.llm_model.invoke(filled_prompt)
+        return filled_prompt
+
+    @staticmethod
+    def _parse_translation_inator(translated_query: str) -> TranslatedQuery:
         logging.info(f"Raw translated query: {translated_query!r}")
 
         try: 
@@ -68,22 +120,28 @@ class RetrieverInator:
 
         return TranslatedQuery(**parsed_query)
 
-    def constructor_inator(self,translated_query: TranslatedQuery) :
+    def translator_inator(self, user_query: str):
+        """
+             translates user input into vectorstore queries
+        """
+        translated_query = self.llm_model.invoke(self._translation_prompt_inator(user_query))
+        return self._parse_translation_inator(translated_query)
+
+    async def async_translator_inator(self, user_query: str) -> TranslatedQuery:
+        """translator_inator on the async ollama client, the event loop keeps serving"""
+        translated_query = await self.llm_model.ainvoke(self._translation_prompt_inator(user_query))
+        return self._parse_translation_inator(translated_query)
+
+    def constructor_inator(self,translated_query: TranslatedQuery) -> dict:
         """
             constructs vectorstore queries from user input
 
         """
-        # WARN: vectorstore matching has not been implemented
         # the constructor returns subqueries and routes to relevant vectorstores 
+        # pairs are checked exactly against the taxonomy, a domain and a subject
+        # that both exist but not together (physics, genetics) have no store
 
-        available_stores, _ = knowledgebase_index_inator(Path(self.vectorstores_root))
-        valid_paths = set()
-        for domain in available_stores["domains"]:
-            for subject in available_stores["subjects"]:
-                valid_paths.add((domain, subject))
-
-
-        self.constructed_query = {"routes": []}
+        constructed_query = {"routes": []}
 
         for subquery in translated_query.subqueries:
             domain = subquery.domain
@@ -93,43 +151,125 @@ class RetrieverInator:
                 logging.warning("skipping subquery with missing domain/subject")
                 continue
 
-            if (domain, subject) not in valid_paths:
+            path = self.taxonomy.route_inator(domain, subject)
+            if path is None:
                 logging.warning(f"Invalid domain/subject pair: ({domain}, {subject}) skippng subquery")
                 continue
-            path = Path(self.vectorstores_root)/domain/subject
-            self.constructed_query["routes"].append({"subquery": subquery, "path": str(path)})
+            constructed_query["routes"].append({"subquery": subquery, "path": path})
 
-        return self.constructed_query
+        return constructed_query
 
-    def retrieve_inator(self, k: int=3):
+    def retrieve_inator(self, constructed_query: dict, k: int=3) -> list:
         """
             queries vectorstores using constructed_query
             and generates final response
+            routes are searched side by side on self.executor, a route that
+            fails or isn't done route_timeout after they all started comes back
+            empty with an "error" (one deadline for the lot, not one per route)
         """
 
        # TODO: similarity_search vs as_retriever 
-        for route in self.constructed_query["routes"]:
-            store = Chroma (
-                collection_name=route["subquery"].subject,
-                persist_directory=route["path"],
-                embedding_function=self.embedding_model
-            )
+        routes = constructed_query["routes"]
+        futures = [self._submit_route_inator(route, k) for route in routes]
+        wait(futures, timeout=self.route_timeout)
+
+        all_results = []
+        for route, future in zip(routes, futures):
+            if not future.done():
+                all_results.append(self._failed_route_inator(route, TimeoutError(), future))
+                continue
+            try:
+                all_results.append(future.result())
+            except Exception as e:
+                all_results.append(self._failed_route_inator(route, e, future))
+
+        return all_results
+
+    def _route_inator(self, route: dict, k: int = 3) -> list:
+        """mmr search of one route, blocking (query embedding and chroma)"""
+        # pooled handles, a subject queried before has its index loaded already
+        with store_pool.lease_inator(
+            persist_directory=route["path"],
+            collection_name=route["subquery"].subject,
+            embedding_model=self.embedding_model_name
+        ) as store:
             retrieve = store.as_retriever(
                 search_type="mmr", 
                 search_kwargs={"k": k, "fetch_k": 15}
             )
-            result = retrieve.invoke(route["subquery"].text)
-            self.all_results.append(result)
+            return retrieve.invoke(route["subquery"].text)
 
-        return self.all_results
+    def _timed_route_inator(self, route: dict, k: int = 3) -> list:
+        start = time.perf_counter()
+        try:
+            return self._route_inator(route, k)
+        finally:
+            route["seconds"] = round(time.perf_counter() - start, 3)
 
-    def generate_inator(self, user_query: str, top_k_chunks: int = 5):
+    def _submit_route_inator(self, route: dict, k: int = 3) -> Future:
         """
-        Generates a response to user_query using retrieved documents,
-        summarizing and deduplicating chunks, and producing tiered output.
+            search a route on self.executor; a store that still has a timed out
+            search running fails fast instead, so a hanging store can't take
+            every executor thread and starve the healthy ones
+        """
+        with self._hung_lock:
+            hung = self._hung.get(route["path"], 0)
+        if hung:
+            future = Future()
+            future.set_exception(RuntimeError(f"store busy, {hung} earlier search(es) timed out and are still running"))
+            return future
+        return self.executor.submit(self._timed_route_inator, route, k)
+
+    def _hung_inator(self, route: dict, future: Future):
+        """mark the route's store hung until its timed out search finally returns"""
+        path = route["path"]
+        with self._hung_lock:
+            self._hung[path] = self._hung.get(path, 0) + 1
+
+        def release(_):
+            with self._hung_lock:
+                self._hung[path] -= 1
+                if not self._hung[path]:
+                    del self._hung[path]
+        future.add_done_callback(release)
+
+    def _failed_route_inator(self, route: dict, error: Exception, future: Future | None = None) -> list:
+        """partial results: the route gives nothing, the rest of the answer goes ahead"""
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            route["error"] = f"timed out after {self.route_timeout}s"
+            if future is not None and not future.cancel():
+                self._hung_inator(route, future)
+        else:
+            route["error"] = str(error) or type(error).__name__
+        logging.warning(f"route {route['path']} failed, answering without it: {route['error']}")
+        return []
+
+    async def async_retrieve_inator(self, constructed_query: dict, k: int = 3) -> list:
+        """
+            retrieve_inator for the async path: every route at once, at most
+            route_concurrency of them in flight, each search on self.executor
+            so it never runs on the event loop; results keep the route order
+            takes about as long as the slowest route, not the sum of them
         """
+        slots = asyncio.Semaphore(self.route_concurrency)
+
+        async def search(route: dict) -> list:
+            async with slots:
+                future = self._submit_route_inator(route, k)
+                try:
+                    # shielded, so a timeout leaves the search running (it can't be
+                    # interrupted anyway) and _failed_route_inator marks its store hung
+                    return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.route_timeout)
+                except Exception as e:
+                    return self._failed_route_inator(route, e, future)
+
+        return list(await asyncio.gather(*(search(route) for route in constructed_query["routes"])))
+
+    @staticmethod
+    def _select_inator(all_results: list, top_k_chunks: int = 5) -> list:
+        """flattened, deduplicated, top_k_chunks of the retrieved documents"""
         # Flatten retrieved documents
-        flat_docs = [doc for docs in self.all_results for doc in docs]
+        flat_docs = [doc for docs in all_results for doc in docs]
 
         # Deduplicate chunks based on page_content
         seen = set()
@@ -140,20 +280,87 @@ class RetrieverInator:
                 dedup_docs.append(doc)
 
         # Optionally limit to top_k_chunks
-        selected_docs = dedup_docs[:top_k_chunks]
+        return dedup_docs[:top_k_chunks]
 
-        # Step 1: Summarize each chunk individually to reduce noise
-        chunk_summaries = []
-        for doc in selected_docs:
-            summary_prompt = f"""
+    @staticmethod
+    def _mode_inator(compression: str) -> str:
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"unknown compression mode {compression!r}, expected one of {COMPRESSION_MODES}")
+        return compression
+
+    @staticmethod
+    def _summary_prompt_inator(doc) -> str:
+        return f"""
             Summarize the following text in 1–2 sentences, keeping only the key factual information:
             {doc.page_content}
             """
-            summary = self.llm_model.invoke(summary_prompt)
-            chunk_summaries.append(summary.strip())
 
-        # Step 2: Combine summaries as context
-        context_text = "\n\n".join(chunk_summaries)
+    @staticmethod
+    def _batched_summary_prompt_inator(docs: list) -> str:
+        """every chunk in one prompt, one numbered summary line back per chunk"""
+        texts = "\n\n".join(f"[{n}] {doc.page_content}" for n, doc in enumerate(docs, start=1))
+        return f"""
+            Summarize each numbered text below in 1–2 sentences, keeping only the key factual information.
+            Answer with one numbered line per text, in the same order, nothing else.
+
+            {texts}
+            """
+
+    @staticmethod
+    def _raw_context_inator(docs: list, max_tokens: int = RAW_CONTEXT_TOKENS) -> list[str]:
+        """chunk text unchanged, in retrieval order, cut off at max_tokens"""
+        context, remaining = [], max_tokens
+        for doc in docs:
+            tokens = IngestInator.token_inator(doc.page_content)
+            if tokens <= remaining:
+                context.append(doc.page_content)
+                remaining -= tokens
+                continue
+            # the first chunk that doesn't fit goes in partly, then the budget is spent
+            if remaining > 0:
+                context.append(doc.page_content[:len(doc.page_content) * remaining // tokens])
+            break
+        return context
+
+    def _compress_inator(self, selected_docs: list, mode: str) -> list[str]:
+        """context parts for the answer prompt, blocking"""
+        if not selected_docs:
+            return []
+        if mode == "raw":
+            return self._raw_context_inator(selected_docs)
+        if mode == "batched":
+            return [self.llm_model.invoke(self._batched_summary_prompt_inator(selected_docs)).strip()]
+
+        # langchain runs the batch on a thread pool, at most max_concurrency calls at a time
+        summaries = self.llm_model.batch(
+            [self._summary_prompt_inator(doc) for doc in selected_docs],
+            config={"max_concurrency": SUMMARY_CONCURRENCY}
+        )
+        return [summary.strip() for summary in summaries]
+
+    async def _async_compress_inator(self, selected_docs: list, mode: str) -> list[str]:
+        """_compress_inator on the async client"""
+        if not selected_docs:
+            return []
+        if mode == "raw":
+            return self._raw_context_inator(selected_docs)
+        if mode == "batched":
+            summary = await self.llm_model.ainvoke(self._batched_summary_prompt_inator(selected_docs))
+            return [summary.strip()]
+
+        slots = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+        async def summarize(doc) -> str:
+            async with slots:
+                summary = await self.llm_model.ainvoke(self._summary_prompt_inator(doc))
+                return summary.strip()
+
+        return list(await asyncio.gather(*(summarize(doc) for doc in selected_docs)))
+
+    @staticmethod
+    def _answer_prompt_inator(user_query: str, context_parts: list[str]) -> str:
+        # Step 2: Combine summaries (or raw chunks) as context
+        context_text = "\n\n".join(context_parts)
 
         # Step 3: Tiered answer prompt
         base_prompt = RosePrompts.get_prompt("rose_answer")
@@ -171,8 +378,84 @@ class RetrieverInator:
             question=user_query,
             context=context_text
         )
+        return final_prompt
+
+    def generate_inator(self, user_query: str, all_results: list, top_k_chunks: int = 5,
+                        compression: str | None = None, timings: dict | None = None):
+        """
+        Generates a response to user_query using retrieved documents,
+        summarizing and deduplicating chunks, and producing tiered output.
+        compression picks how chunks are condensed (COMPRESSION_MODES), self.compression by default
+        timings, when given, gets the seconds spent compressing and answering
+        """
+        mode = self._mode_inator(compression or self.compression)
+        selected_docs = self._select_inator(all_results, top_k_chunks)
+
+        # Step 1: Condense the chunks to reduce noise
+        start = time.perf_counter()
+        context_parts = self._compress_inator(selected_docs, mode)
+        compressed = time.perf_counter()
 
         # Step 4: Invoke LLM
-        response = self.llm_model.invoke(final_prompt)
+        response = self.llm_model.invoke(self._answer_prompt_inator(user_query, context_parts))
+        if timings is not None:
+            timings.update(compression=mode, compress=round(compressed - start, 3),
+                           answer=round(time.perf_counter() - compressed, 3))
         return response
 
+    async def async_generate_inator(self, user_query: str, all_results: list, top_k_chunks: int = 5,
+                                    compression: str | None = None, timings: dict | None = None) -> str:
+        """generate_inator on the async ollama client"""
+        mode = self._mode_inator(compression or self.compression)
+        selected_docs = self._select_inator(all_results, top_k_chunks)
+
+        start = time.perf_counter()
+        context_parts = await self._async_compress_inator(selected_docs, mode)
+        compressed = time.perf_counter()
+
+        response = await self.llm_model.ainvoke(self._answer_prompt_inator(user_query, context_parts))
+        if timings is not None:
+            timings.update(compression=mode, compress=round(compressed - start, 3),
+                           answer=round(time.perf_counter() - compressed, 3))
+        return response
+
+    def answer_inator(self, user_query: str, compression: str | None = None) -> QueryStateInator:
+        """translate, route, retrieve and generate for one chat, state.response is the reply"""
+        state = QueryStateInator(user_query)
+        start = time.perf_counter()
+        state.translated_query = self.translator_inator(user_query=user_query)
+        logging.info(f"Translated query: {state.translated_query}")
+        translated = time.perf_counter()
+
+        state.constructed_query = self.constructor_inator(translated_query=state.translated_query)
+        state.results = self.retrieve_inator(state.constructed_query)
+        retrieved = time.perf_counter()
+        state.timings.update(translate=round(translated - start, 3), retrieve=round(retrieved - translated, 3))
+
+        state.response = self.generate_inator(user_query=user_query, all_results=state.results,
+                                              compression=compression, timings=state.timings)
+        state.timings["total"] = round(time.perf_counter() - start, 3)
+        logging.info(f"Chat timings: {state.timings}")
+        return state
+
+    async def async_answer_inator(self, user_query: str, compression: str | None = None) -> QueryStateInator:
+        """
+            answer_inator for async endpoints: llm calls await the async client,
+            chroma runs on the bounded executor, nothing blocks the event loop
+        """
+        state = QueryStateInator(user_query)
+        start = time.perf_counter()
+        state.translated_query = await self.async_translator_inator(user_query=user_query)
+        logging.info(f"Translated query: {state.translated_query}")
+        translated = time.perf_counter()
+
+        state.constructed_query = self.constructor_inator(translated_query=state.translated_query)
+        state.results = await self.async_retrieve_inator(state.constructed_query)
+        retrieved = time.perf_counter()
+        state.timings.update(translate=round(translated - start, 3), retrieve=round(retrieved - translated, 3))
+
+        state.response = await self.async_generate_inator(user_query=user_query, all_results=state.results,
+                                                          compression=compression, timings=state.timings)
+        state.timings["total"] = round(time.perf_counter() - start, 3)
+        logging.info(f"Chat timings: {state.timings}")
+        return state
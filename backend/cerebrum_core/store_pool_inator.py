@@ -0,0 +1,241 @@
+import os
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from contextlib import contextmanager
+from collections import OrderedDict
+from langchain_chroma import Chroma
+from langchain_ollama import OllamaEmbeddings
+from chromadb.api.shared_system_client import SharedSystemClient
+
+from cerebrum_core.embedding_cache_inator import CachedEmbeddingInator
+from cerebrum_core.file_manager_inator import CerebrumPaths
+
+logger = logging.getLogger(__name__)
+
+# what open stores may hold in memory, estimated from their index files on disk
+STORE_POOL_BUDGET = 2 * 1024 ** 3
+# stores opened and loaded when the app starts
+STORE_WARMUP = 4
+
+
+class StorePoolInator:
+    """
+    keeps long lived vectorstore handles around
+        one (disk cached) embedding client per model
+        one chroma handle per (persist_directory, collection)
+    so ingest stops rebuilding clients for every chunk
+    and repeated queries against a subject skip loading its index
+        handles are kept least recently used first and closed once the
+        estimated size of the open indexes goes over max_bytes;
+        a handle leased with lease_inator is never closed under its user
+    """
+
+    def __init__(self, max_bytes: int = STORE_POOL_BUDGET) -> None:
+        self.max_bytes = max_bytes
+        self._embeddings: dict[str, CachedEmbeddingInator] = {}
+        self._stores: OrderedDict[tuple[str, str], Chroma] = OrderedDict()
+        self._sizes: dict[tuple[str, str], int] = {}
+        self._leases: dict[tuple[str, str], int] = {}
+        self._uses: dict[tuple[str, str], int] = {}
+        self.opened = 0
+        self.evicted = 0
+        self._lock = Lock()
+
+    def embedding_inator(self, embedding_model: str) -> CachedEmbeddingInator:
+        """return the shared embedding client for embedding_model"""
+        with self._lock:
+            embeddings = self._embeddings.get(embedding_model)
+            if embeddings is None:
+                embeddings = CachedEmbeddingInator(
+                    embeddings=OllamaEmbeddings(model=embedding_model),
+                    model_name=embedding_model
+                )
+                self._embeddings[embedding_model] = embeddings
+            return embeddings
+
+    def cache_stats_inator(self) -> list[dict]:
+        """hit/miss counters for every embedding model in use"""
+        with self._lock:
+            embeddings = list(self._embeddings.values())
+        return [embedding.stats_inator() for embedding in embeddings]
+
+    def flush_cache_inator(self):
+        """write out what the embedding caches hold back (last_used of recent hits)"""
+        with self._lock:
+            embeddings = list(self._embeddings.values())
+        for embedding in embeddings:
+            embedding.flush_inator()
+
+    def stats_inator(self) -> dict:
+        """open handles, estimated bytes against the budget, opens and evictions so far"""
+        with self._lock:
+            return {
+                "open": len(self._stores),
+                "bytes": sum(self._sizes.values()),
+                "max_bytes": self.max_bytes,
+                "opened": self.opened,
+                "evicted": self.evicted,
+                "stores": [
+                    {"path": path, "collection": collection, "bytes": self._sizes.get((path, collection), 0),
+                     "uses": self._uses.get((path, collection), 0), "leased": self._leases.get((path, collection), 0)}
+                    for path, collection in self._stores
+                ],
+            }
+
+    @staticmethod
+    def _size_inator(persist_directory: str) -> int:
+        """bytes of the hnsw segment files, roughly what a loaded index takes in memory"""
+        size = 0
+        try:
+            with os.scandir(persist_directory) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    with os.scandir(entry.path) as segment:
+                        size += sum(file.stat().st_size for file in segment if file.is_file())
+        except FileNotFoundError:
+            pass
+        return size
+
+    def store_inator(self, persist_directory: str, collection_name: str, embedding_model: str) -> Chroma:
+        """return the open chroma collection, creating it on first use"""
+        embeddings = self.embedding_inator(embedding_model)
+        key = (str(persist_directory), collection_name)
+
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                store = Chroma(
+                    collection_name=collection_name,
+                    persist_directory=str(persist_directory),
+                    embedding_function=embeddings
+                )
+                self._stores[key] = store
+                self._sizes[key] = self._size_inator(key[0])
+                self.opened += 1
+            self._stores.move_to_end(key)
+            self._uses[key] = self._uses.get(key, 0) + 1
+            self._evict_over_budget_inator(keep=key)
+            return store
+
+    @contextmanager
+    def lease_inator(self, persist_directory: str, collection_name: str, embedding_model: str):
+        """store_inator, with the handle kept open until the block is done with it"""
+        key = (str(persist_directory), collection_name)
+        with self._lock:
+            self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield self.store_inator(persist_directory, collection_name, embedding_model)
+        finally:
+            with self._lock:
+                self._leases[key] -= 1
+                if not self._leases[key]:
+                    del self._leases[key]
+                self._evict_over_budget_inator()
+
+    def _close_inator(self, key: tuple[str, str]):
+        """drop a handle, and chroma's client for the directory once nothing else uses it (lock held)"""
+        self._stores.pop(key, None)
+        self._sizes.pop(key, None)
+        if any(other[0] == key[0] for other in self._stores):
+            return
+        system = SharedSystemClient._identifier_to_system.pop(key[0], None)
+        if system is not None:
+            try:
+                system.stop()
+            except Exception:
+                logger.exception(f"failed to close chroma client for {key[0]}")
+
+    def _evict_over_budget_inator(self, keep: tuple[str, str] | None = None):
+        """close least recently used, unleased handles until under max_bytes (lock held)"""
+        total = sum(self._sizes.values())
+        for key in list(self._stores):
+            if total <= self.max_bytes:
+                break
+            if key == keep or self._leases.get(key):
+                continue
+            total -= self._sizes.get(key, 0)
+            self._close_inator(key)
+            self.evicted += 1
+
+    def invalidate_inator(self, persist_directory: str, collection_name: str | None = None):
+        """
+            ingest wrote to a store: writes go through the pooled handle, so it
+            stays current, but the index grew or shrank and is measured again
+        """
+        with self._lock:
+            for key in self._stores:
+                if key[0] == str(persist_directory) and collection_name in (None, key[1]):
+                    self._sizes[key] = self._size_inator(key[0])
+            self._evict_over_budget_inator()
+
+    def evict_inator(self, persist_directory: str | None = None) -> int:
+        """close handles for persist_directory (or all of them) that nobody is using"""
+        with self._lock:
+            keys = [
+                key for key in self._stores
+                if (persist_directory is None or key[0] == str(persist_directory))
+                and not self._leases.get(key)
+            ]
+            for key in keys:
+                self._close_inator(key)
+            return len(keys)
+
+    def warm_inator(self, stores: list[tuple[str, str]], embedding_model: str, limit: int = STORE_WARMUP) -> int:
+        """
+            open stores and load their indexes ahead of the first query
+            stores is (persist_directory, collection) most important first,
+            stops at limit or once the budget is used up
+        """
+        warmed = 0
+        for persist_directory, collection_name in stores:
+            if warmed >= limit:
+                break
+            if not (Path(persist_directory) / "chroma.sqlite3").exists():
+                continue
+            if sum(self._sizes.values()) + self._size_inator(persist_directory) > self.max_bytes:
+                break
+            try:
+                with self.lease_inator(persist_directory, collection_name, embedding_model) as store:
+                    # one stored vector queried against itself loads the index, no embedding call
+                    sample = store._collection.get(limit=1, include=["embeddings"])
+                    if len(sample["embeddings"]):
+                        store._collection.query(query_embeddings=[sample["embeddings"][0]], n_results=1)
+                with self._lock:
+                    # warming up is not a use, it would rank itself up next start
+                    self._uses[(str(persist_directory), collection_name)] -= 1
+                warmed += 1
+            except Exception:
+                logger.exception(f"failed to warm {persist_directory}")
+        return warmed
+
+    def usage_inator(self, usage_path: Path | None = None) -> dict[tuple[str, str], int]:
+        """uses per store from earlier runs plus this one, what warm-up ranks by"""
+        usage_path = usage_path or CerebrumPaths().get_kb_dir() / "cache" / "store_usage.json"
+        usage = {}
+        if usage_path.exists():
+            try:
+                usage = {tuple(key.split("\n", 1)): uses for key, uses in json.loads(usage_path.read_text()).items()}
+            except (ValueError, TypeError):
+                usage = {}
+        with self._lock:
+            for key, uses in self._uses.items():
+                usage[key] = usage.get(key, 0) + uses
+        return usage
+
+    def save_usage_inator(self, usage_path: Path | None = None):
+        """persist usage_inator for the next start"""
+        usage_path = usage_path or CerebrumPaths().get_kb_dir() / "cache" / "store_usage.json"
+        usage_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"\n".join(key): uses for key, uses in self.usage_inator(usage_path).items()}
+        partial = usage_path.with_suffix(".partial")
+        partial.write_text(json.dumps(data))
+        partial.replace(usage_path)
+        with self._lock:
+            self._uses.clear()
+
+
+# shared across the app so every ingest run and every query reuses the same handles
+store_pool = StorePoolInator()
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from cerebrum_core.model_inator import KnowledgeBase
+from cerebrum_core.file_manager_inator import CerebrumPaths
+
+path = CerebrumPaths()
+
+# stores copied in or deleted by hand are looked for at most this often (seconds),
+# and only when root or one of its domain/subject dirs changed mtime
+CHECK_INTERVAL = 5.0
+
+
+class TaxonomyInator:
+    """
+    the domain -> subject -> vectorstore map of one vectorstores root
+        kept as a KnowledgeBase model and persisted as json next to the registry
+        ingest adds and removes chunk counts as it writes to a store,
+        routing looks pairs up in memory, nothing is walked per query
+        stores live at root/domain/subject with the subject as collection name
+        changes made outside ingest show up through the dir mtimes (see CHECK_INTERVAL)
+    """
+
+    def __init__(self, root: Path, check_interval: float = CHECK_INTERVAL):
+        self.root = Path(root)
+        key = hashlib.sha256(str(self.root.resolve()).encode()).hexdigest()[:12]
+        self.TAXONOMY_PATH = path.get_kb_dir() / "registry" / f"taxonomy-{key}.json"
+        self.TAXONOMY_PATH.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.loaded = self.TAXONOMY_PATH.exists()
+        if self.loaded:
+            self.knowledgebase = KnowledgeBase.model_validate_json(self.TAXONOMY_PATH.read_text())
+        else:
+            self.knowledgebase = self._empty_inator()
+        self._routes = self._routes_inator()
+
+        self.check_interval = check_interval
+        # the saved map is trusted for what is on disk now, changes from here on are picked up
+        self._mtimes = self._mtimes_inator()
+        self._checked = time.monotonic()
+        # pairs ingest emptied, their store dir stays behind but must not route again
+        self._emptied: set[tuple[str, str]] = set()
+
+    def _empty_inator(self) -> KnowledgeBase:
+        return KnowledgeBase(name=self.root.parent.name or "knowledgebase", description=str(self.root))
+
+    def _routes_inator(self) -> dict:
+        """(domain, subject) -> Subject, the lookup table behind route_inator"""
+        return {
+            (domain.name, subject.name): subject
+            for domain in self.knowledgebase.domains
+            for subject in domain.subjects
+        }
+
+    def _pair_inator(self, store_path: str | Path, collection: str) -> tuple[str, str] | None:
+        """(domain, subject) for a store under root, None for stores elsewhere"""
+        store_path = Path(store_path)
+        try:
+            parts = store_path.resolve().relative_to(self.root.resolve()).parts
+        except ValueError:
+            return None
+        if len(parts) != 2 or parts[1] != collection:
+            return None
+        return parts[0], parts[1]
+
+    def _subject_inator(self, domain_name: str, subject_name: str):
+        """the Subject for a pair, added to the model when new (caller holds the lock)"""
+        subject = self._routes.get((domain_name, subject_name))
+        if subject is None:
+            domain = self.knowledgebase.get_domain(domain_name) or self.knowledgebase.add_domain(domain_name, "")
+            subject = domain.add_subject(subject_name, "")
+            subject.store_path = str(self.root / domain_name / subject_name)
+            self._routes[(domain_name, subject_name)] = subject
+        return subject
+
+    def _drop_inator(self, domain_name: str, subject_name: str):
+        """forget a pair that has no chunks left (caller holds the lock)"""
+        domain = self.knowledgebase.get_domain(domain_name)
+        domain.subjects = [subject for subject in domain.subjects if subject.name != subject_name]
+        if not domain.subjects:
+            self.knowledgebase.domains = [d for d in self.knowledgebase.domains if d.name != domain_name]
+        del self._routes[(domain_name, subject_name)]
+
+    def save_inator(self):
+        with self._lock:
+            partial = self.TAXONOMY_PATH.with_suffix(".partial")
+            partial.write_text(self.knowledgebase.model_dump_json(indent=2))
+            partial.replace(self.TAXONOMY_PATH)
+
+    def add_chunks_inator(self, store_path: str | Path, collection: str, delta: int):
+        """
+            chunks were written to (delta > 0) or deleted from (delta < 0) a store
+            a subject that drops to zero chunks stops being routable
+        """
+        pair = self._pair_inator(store_path, collection)
+        if pair is None or not delta:
+            return
+
+        with self._lock:
+            if delta < 0 and pair not in self._routes:
+                return
+            if delta > 0:
+                self._emptied.discard(pair)
+            subject = self._subject_inator(*pair)
+            if subject.chunk_count is None:
+                # found on disk with an unknown count, it stays that way
+                return
+            subject.chunk_count = max(0, subject.chunk_count + delta)
+            if subject.chunk_count == 0:
+                self._drop_inator(*pair)
+                self._emptied.add(pair)
+        self.save_inator()
+
+    def rebuild_inator(self, registry) -> KnowledgeBase:
+        """
+            start over from the chunks table, plus stores on disk
+            the registry knows nothing about (copied in, or from before chunk tracking)
+        """
+        with self._lock:
+            self.knowledgebase = self._empty_inator()
+            self._routes = {}
+
+            for store_path, collection, count in registry.store_counts_inator():
+                pair = self._pair_inator(store_path, collection)
+                if pair is not None and count:
+                    self._subject_inator(*pair).chunk_count = count
+
+            if self.root.is_dir():
+                for domain in os.scandir(self.root):
+                    if not domain.is_dir():
+                        continue
+                    for subject in os.scandir(domain.path):
+                        pair = (domain.name, subject.name)
+                        if pair in self._routes or not subject.is_dir():
+                            continue
+                        if os.path.exists(os.path.join(subject.path, "chroma.sqlite3")):
+                            self._subject_inator(*pair).chunk_count = None
+
+            self.loaded = True
+        self.save_inator()
+        return self.knowledgebase
+
+    def _mtimes_inator(self) -> dict[str, float]:
+        """mtimes of root and the domain/subject dirs, the two levels where stores appear"""
+        mtimes = {}
+        if not self.root.is_dir():
+            return mtimes
+        mtimes[str(self.root)] = self.root.stat().st_mtime
+        for domain in os.scandir(self.root):
+            if not domain.is_dir():
+                continue
+            mtimes[domain.path] = domain.stat().st_mtime
+            for subject in os.scandir(domain.path):
+                if subject.is_dir():
+                    mtimes[subject.path] = subject.stat().st_mtime
+        return mtimes
+
+    def _check_inator(self):
+        """
+            pick up stores that appeared or vanished on disk without going through ingest
+            new ones route with an unknown count, missing ones stop routing
+        """
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+
+        changed = False
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return
+            self._checked = now
+            mtimes = self._mtimes_inator()
+            if mtimes == self._mtimes:
+                return
+            self._mtimes = mtimes
+
+            for pair, subject in list(self._routes.items()):
+                if not os.path.exists(os.path.join(subject.store_path, "chroma.sqlite3")):
+                    self._drop_inator(*pair)
+                    changed = True
+
+            for store_path in mtimes:
+                parts = Path(store_path).relative_to(self.root).parts
+                if len(parts) != 2 or parts in self._routes or parts in self._emptied:
+                    continue
+                if os.path.exists(os.path.join(store_path, "chroma.sqlite3")):
+                    self._subject_inator(*parts).chunk_count = None
+                    changed = True
+        if changed:
+            self.save_inator()
+
+    def route_inator(self, domain: str, subject: str) -> str | None:
+        """store path for an exact (domain, subject) pair, None if there is no such store"""
+        self._check_inator()
+        subject = self._routes.get((domain, subject))
+        return subject.store_path if subject is not None else None
+
+    def prompt_inator(self) -> str:
+        """the real stores as {domain: [subjects]}, compact enough for the translator prompt"""
+        self._check_inator()
+        with self._lock:
+            stores = {
+                domain.name: sorted(subject.name for subject in domain.subjects)
+                for domain in sorted(self.knowledgebase.domains, key=lambda d: d.name)
+            }
+        return json.dumps(stores)
+
+
+_taxonomies: dict[str, TaxonomyInator] = {}
+_taxonomies_lock = threading.Lock()
+
+def shared_taxonomy_inator(root: Path) -> TaxonomyInator:
+    """the app wide TaxonomyInator for root"""
+    key = str(Path(root).resolve())
+    with _taxonomies_lock:
+        taxonomy = _taxonomies.get(key)
+        if taxonomy is None:
+            taxonomy = TaxonomyInator(Path(root))
+            _taxonomies[key] = taxonomy
+        return taxonomy
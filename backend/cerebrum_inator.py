@@ -1,10 +1,15 @@
 import uvicorn
+import threading
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
 from local_server import routes_projects, routes_process_files, routes_study_bubble
 from cerebrum_core.file_manager_inator import CerebrumPaths, FileRegisterInator
+from cerebrum_core.job_queue_inator import JobQueueInator
+from cerebrum_core.taxonomy_inator import shared_taxonomy_inator
+from cerebrum_core.store_pool_inator import store_pool
+from cerebrum_core.retriever_inator import RetrieverInator
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -14,11 +19,37 @@ async def lifespan(app: FastAPI):
     registry = FileRegisterInator()
     app.state.registry = registry
 
+    # domain/subject routing table, counted from the registry on first run
+    taxonomy = shared_taxonomy_inator(routes_process_files.vectorstores_dir)
+    if not taxonomy.loaded:
+        taxonomy.rebuild_inator(registry)
+
+    # one retriever for every chat, its model clients keep their connections open
+    app.state.retriever = RetrieverInator(
+        vectorstores_root=str(routes_process_files.vectorstores_dir),
+        embedding_model=routes_process_files.embedding_model,
+        llm_model=routes_process_files.llm_model,
+        taxonomy=taxonomy
+    )
+
+    # load the most used stores in the background, the first chats skip it
+    threading.Thread(target=routes_process_files.warm_stores_inator, name="store-warmup", daemon=True).start()
+
+    # durable ingest queue, jobs left over from a previous run resume here
+    job_queue = JobQueueInator()
+    app.state.job_queue = job_queue
+    app.state.ingest_workers = routes_process_files.start_ingest_workers(registry, job_queue)
+
     app.include_router(routes_projects.project_router)
     app.include_router(routes_study_bubble.bubble_router)
     app.include_router(routes_process_files.router)
     yield
 
+    app.state.ingest_workers.stop()
+    app.state.retriever.close_inator()
+    store_pool.flush_cache_inator()
+    store_pool.save_usage_inator()
+
 
 def create_api_server():
     """
@@ -28,6 +59,10 @@ def create_api_server():
     # %%
     app = FastAPI(lifespan=lifespan)
 
+    # oversized uploads are refused before their body is read
+    # (added first, so CORS still wraps the 413)
+    app.middleware("http")(routes_process_files.upload_limit_middleware)
+
     app.add_middleware(
         CORSMiddleware, 
         allow_origins=["*"],
@@ -1,11 +1,28 @@
 # %%
+import os
+import json
+import time
+import asyncio
+import hashlib
+import zipfile
 import pymupdf
+import tempfile
+import threading
 from pathlib import Path
-from fastapi import APIRouter, BackgroundTasks, Request, UploadFile, File, HTTPException
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import APIRouter, Body, Request, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from cerebrum_core.ingest_inator import IngestInator
-from cerebrum_core.file_manager_inator import CerebrumPaths, file_walker_inator
-from cerebrum_core.utils.progress_bar import progress_bar
+from cerebrum_core.model_inator import FileMetadata
+from cerebrum_core.ingest_inator import IngestInator, ConvertPoolInator, markdown_worker_inator
+from cerebrum_core.pipeline_inator import PipelineInator
+from cerebrum_core.file_manager_inator import CerebrumPaths, WalkSnapshotInator
+from cerebrum_core.taxonomy_inator import shared_taxonomy_inator
+from cerebrum_core.store_pool_inator import store_pool, STORE_WARMUP
+from cerebrum_core.job_queue_inator import JobQueueInator, IngestWorkerInator, PRIORITY_BULK, PRIORITY_UPLOAD
+from cerebrum_core.progress_inator import progress_events
 
 router = APIRouter(prefix="/process")
 paths = CerebrumPaths()
@@ -14,185 +31,958 @@ markdown_files_dir = paths.get_kb_dir() / "markdown"
 markdown_files_dir.mkdir(parents=True, exist_ok=True)
 
 knowledgebase_dir = paths.get_kb_dir()
+# where the chat routes look for stores
+vectorstores_dir = knowledgebase_dir / "vectorstores"
 embedding_model = "qwen3-embedding:4b-q4_K_M"
 llm_model = "granite4:micro"
 
+# pdf -> markdown is cpu bound, leave one core for the server itself
+convert_workers = max(1, (os.cpu_count() or 1) - 1)
+
+# ingest job workers per stage (a library convert job uses convert_workers processes itself)
+# whole-library runs get a stage of their own, so uploads never queue behind one
+ingest_workers = {"convert": 1, "embed": 1, "library": 1}
+
+# (stage, kind) library jobs were queued under before they had their own stage
+LEGACY_LIBRARY_JOBS = {
+    ("convert", "library"): ("library", "convert"),
+    ("embed", "library"): ("library", "embed"),
+    ("convert", "ingest"): ("library", "ingest"),
+}
+
+# overlapped ingest pipeline: threads per stage after convert, and items queued between stages
+pipeline_workers = {"chunk": 1, "embed": 1}
+pipeline_queue_size = 4
+
+# seconds between keepalive comments on an idle /events stream
+events_keepalive = 15
+
+# uploads are streamed to disk in fixed size chunks, never held whole in memory
+upload_chunk_size = 1024 * 1024
+max_upload_bytes = 1024 * 1024 * 1024
+# multipart framing around the pdf, allowed on top of max_upload_bytes
+upload_overhead_bytes = 64 * 1024
+# a /upload/bulk request as a whole, each file in it is still held to max_upload_bytes
+max_bulk_upload_bytes = 16 * max_upload_bytes
+
 
 # ==========================================================
 # CONVERTER
 # ==========================================================
-def markdown_converter_inator(knowledgebase_dir: Path, llm_model: str, registry):
-    """Convert PDF files to Markdown"""
-    walked_knowledgebase = file_walker_inator(knowledgebase_dir, max_depth=4)
+def file_metadata_inator(filepath: Path, hash_id: str, llm_model: str, registry) -> FileMetadata:
+    """
+    Sanitized metadata for a file
+    cached in the registry against the content hash, so the llm rename
+    runs once per distinct file rather than once per run
+    """
+    cached = registry.cached_metadata_inator(hash_id)
+    if cached:
+        return FileMetadata(**cached)
+
+    with pymupdf.open(filepath) as pdf:
+        metadata = pdf.metadata
+
+    return IngestInator(filepath=filepath).sanitize_inator(
+        filename=filepath.stem,
+        metadata=metadata,
+        llm_model=llm_model
+    )
+
+
+# library jobs and uploads run on separate workers and can reach the same file at once,
+# so a file's conversion (and its chunk + embed) happen in one place at a time;
+# whoever waited finds the work done
+_claimed: set[str] = set()
+_claimed_changed = threading.Condition()
+
+
+def claim_inator(key: str):
+    """block until no other job holds key, then hold it"""
+    with _claimed_changed:
+        while key in _claimed:
+            _claimed_changed.wait()
+        _claimed.add(key)
+
 
-    for file_info in walked_knowledgebase:
+def release_inator(key: str):
+    with _claimed_changed:
+        _claimed.discard(key)
+        _claimed_changed.notify_all()
+
+
+@contextmanager
+def claimed_inator(key: str):
+    claim_inator(key)
+    try:
+        yield
+    finally:
+        release_inator(key)
+
+
+def markdown_converter_inator(knowledgebase_dir: Path, llm_model: str, registry, workers: int = 1, report=None):
+    """
+    Convert PDF files to Markdown
+    workers > 1 converts in a ConvertPoolInator process pool, registry updates stay in this process
+    report(done, total) is called as files finish
+    """
+    scan = registry.scan_inator(knowledgebase_dir)
+    for removed in scan["deleted"]:
+        forget_source_inator(removed["hash_id"], registry)
+
+    # only new or edited files, plus anything that never finished converting
+    to_convert = scan["added"] + scan["changed"] + [
+        file_info for file_info in scan["unchanged"] + scan["moved"]
+        if not file_info["converted"]
+    ]
+    print(
+        f"{len(to_convert)} files to convert "
+        f"({len(scan['added'])} added, {len(scan['changed'])} changed, "
+        f"{len(scan['unchanged'])} unchanged, {len(scan['deleted'])} deleted)"
+    )
+    # shortest job first, a small upload isn't stuck behind a giant textbook
+    # (recorded convert time for files timed before, size for the rest)
+    costs = registry.cost_inator({file_info["hash_id"]: file_info["size"] for file_info in to_convert}, "convert")
+    to_convert.sort(key=lambda file_info: costs[file_info["hash_id"]])
+    pending = []
+    total = len(to_convert)
+    done = 0
+
+    # before any llm work: same contents may already be converted
+    # (a duplicate, or a move the scan just picked up), looked up in one go
+    statuses = registry.status_inator([file_info["hash_id"] for file_info in to_convert])
+    converted = {hash_id for hash_id, status in statuses.items() if status["converted"]}
+
+    for file_info in to_convert:
         assert file_info is not None, "file info cannot be empty"
 
-        print(f"Converting {file_info['filename']}")
+        if report:
+            report(done, total)
         try:
-            with pymupdf.open(file_info["filepath"]) as pdf:
-                metadata = pdf.metadata
-
-            markdown_files = IngestInator(filepath=file_info["filepath"])
-            sanitized_metadata = markdown_files.sanitize_inator(
-                filename=file_info["filestem"],
-                metadata=metadata,
-                llm_model=llm_model
-            )
+            if file_info["hash_id"] in converted:
+                done += 1
+                continue
+            converted.add(file_info["hash_id"])
+
+            print(f"Converting {file_info['filename']}")
+            sanitized_metadata = file_metadata_inator(file_info["filepath"], file_info["hash_id"], llm_model, registry)
 
-            hash_id = registry.hash_inator(filename=sanitized_metadata.title)
-            registry.register_inator(
+            hash_id = registry.register_inator(
                 original_name=file_info["filestem"],
-                sanitized_name=sanitized_metadata.title
+                sanitized_name=sanitized_metadata.title,
+                filepath=file_info["filepath"],
+                hash_id=file_info["hash_id"],
+                metadata=sanitized_metadata.model_dump()
             )
-            is_converted = registry.check_inator(field="converted",hash_id=hash_id)
-            if is_converted:
+
+            if workers > 1:
+                pending.append((file_info, sanitized_metadata, hash_id))
                 continue
-            markdown_files.markdown_inator(metadata=sanitized_metadata)
-            registry.updater_inator(status="converted", hash_id=hash_id)
+
+            convert_once_inator(registry, hash_id, lambda: markdown_worker_inator(
+                str(file_info["filepath"]), sanitized_metadata.model_dump(), registry, hash_id
+            ))
+            done += 1
 
         except Exception as e:
+            done += 1
+            registry.fail_inator(file_info["hash_id"], "convert", str(e))
             print(f"Failed for {file_info['filename']}: {e}")
 
+    if not pending:
+        if report:
+            report(done, total)
+        return
+
+    # one thread per worker process keeps the pool busy, registry updates stay in this process
+    with ConvertPoolInator(min(workers, len(pending))) as convert_pool, \
+            ThreadPoolExecutor(max_workers=convert_pool.workers) as threads:
+        futures = {
+            threads.submit(
+                convert_once_inator, registry, hash_id,
+                lambda file_info=file_info, metadata=metadata, hash_id=hash_id: convert_pool.convert_inator(
+                    file_info["filepath"], metadata.model_dump(), registry, hash_id
+                )
+            ): (file_info, hash_id)
+            for file_info, metadata, hash_id in pending
+        }
+        for future in as_completed(futures):
+            file_info, hash_id = futures[future]
+            done += 1
+            try:
+                stats = future.result()
+                if stats is None:
+                    print(f"Already converted: {file_info['filename']}")
+                else:
+                    print(f"Converted {file_info['filename']}: {stats['pages']} pages in {stats['seconds']}s")
+            except BrokenProcessPool:
+                # crashed its worker twice, ConvertPoolInator already gave it a fresh pool once
+                registry.fail_inator(hash_id, "convert", "worker crashed")
+                print(f"Failed for {file_info['filename']}: worker crashed")
+            except Exception as e:
+                registry.fail_inator(hash_id, "convert", str(e))
+                print(f"Failed for {file_info['filename']}: {e}")
+            if report:
+                report(done, total)
+
+
+def convert_once_inator(registry, hash_id: str, convert) -> dict | None:
+    """
+    convert() one pdf and record it, None when its contents turn out converted already
+    (another job got there first while this one waited for the claim)
+    """
+    with claimed_inator(f"convert:{hash_id}"):
+        markdown_path = registry.markdown_path_inator(hash_id)
+        if registry.check_inator(field="converted", hash_id=hash_id) and markdown_path and markdown_path.exists():
+            return None
+        stats = convert()
+        registry.updater_inator(status="converted", hash_id=hash_id, markdown_path=Path(stats["markdown_path"]))
+        registry.stats_inator(hash_id, page_count=stats["pages"], convert_seconds=stats["seconds"])
+        return stats
+
 
 # ==========================================================
 # SINGLE FILE PROCESSOR (for uploads)
 # ==========================================================
-def process_single_pdf(file_path: Path, llm_model: str, embedding_model: str, registry):
-    """Process a single PDF: convert to markdown then embed"""
-    print(f"Processing uploaded file: {file_path.name}")
-    
-    try:
-        # Step 1: Convert PDF to Markdown
-        with pymupdf.open(file_path) as pdf:
-            metadata = pdf.metadata
-        
-        markdown_files = IngestInator(filepath=file_path)
-        sanitized_metadata = markdown_files.sanitize_inator(
-            filename=file_path.stem,
-            metadata=metadata,
-            llm_model=llm_model
-        )
-        
-        hash_id = registry.hash_inator(filename=sanitized_metadata.title)
+def convert_single_pdf(file_path: Path, llm_model: str, registry) -> tuple[str, FileMetadata, Path]:
+    """Convert a single PDF to Markdown, returns (hash_id, metadata, markdown path)"""
+    hash_id = registry.identity_inator(file_path)
+    sanitized_metadata = file_metadata_inator(file_path, hash_id, llm_model, registry)
+
+    registry.register_inator(
+        original_name=file_path.stem,
+        sanitized_name=sanitized_metadata.title,
+        filepath=file_path,
+        hash_id=hash_id,
+        metadata=sanitized_metadata.model_dump()
+    )
+
+    stats = convert_once_inator(
+        registry, hash_id, lambda: markdown_worker_inator(str(file_path), sanitized_metadata.model_dump(), registry, hash_id)
+    )
+    print(f" Already converted: {file_path.name}" if stats is None else f" Converted: {file_path.name}")
+
+    return hash_id, sanitized_metadata, registry.markdown_path_inator(hash_id)
+
+
+def shortest_first_inator(file_paths: list[Path], registry=None, hash_ids: dict[Path, str] | None = None) -> list[Path]:
+    """
+    order files cheapest first, so short jobs finish (and show up) early
+    with a registry the cost is its estimate, recorded ingest seconds for
+    files (by hash_ids) timed before, otherwise just the size
+    """
+    sizes = {}
+    for file_path in file_paths:
+        try:
+            sizes[file_path] = file_path.stat().st_size
+        except OSError:
+            sizes[file_path] = 0
+    if registry is None:
+        return sorted(file_paths, key=sizes.get)
+
+    # files with no known hash have no registry row, they get the size estimate
+    keys = {file_path: (hash_ids or {}).get(file_path, str(file_path)) for file_path in file_paths}
+    costs = registry.cost_inator({keys[file_path]: sizes[file_path] for file_path in file_paths}, "ingest")
+    return sorted(file_paths, key=lambda file_path: costs[keys[file_path]])
+
+
+def pipeline_ingest_inator(file_paths: list[Path], llm_model: str, embedding_model: str, registry,
+                           workers: int = 1, report=None, hash_ids: dict[Path, str] | None = None) -> list[dict]:
+    """
+    Ingest PDFs through an overlapped pipeline
+        metadata -> convert -> chunk -> embed, connected by bounded queues
+        document N+1 converts while document N is chunked or embedded
+        already embedded files are dropped at the metadata stage
+    hash_ids (path -> content hash, where known) lets recorded timings order the files
+    report(done, total, stages) gets per-stage queue depth and throughput
+    returns the final per-stage stats
+    """
+    total = len(file_paths)
+    file_paths = shortest_first_inator(file_paths, registry, hash_ids)
+
+    def metadata_stage(file_path: Path):
+        hash_id = registry.identity_inator(file_path)
+        if registry.check_inator(hash_id=hash_id, field="embedded"):
+            return None
+
+        metadata = file_metadata_inator(file_path, hash_id, llm_model, registry)
         registry.register_inator(
             original_name=file_path.stem,
-            sanitized_name=sanitized_metadata.title
+            sanitized_name=metadata.title,
+            filepath=file_path,
+            hash_id=hash_id,
+            metadata=metadata.model_dump()
         )
-        
-        # Convert to markdown
-        markdown_files.markdown_inator(metadata=sanitized_metadata)
-        registry.updater_inator(status="converted", hash_id=hash_id)
-        print(f" Converted: {file_path.name}")
-        
-        # Step 2: Find the generated markdown file and embed it
-        markdown_file_path = markdown_files_dir / sanitized_metadata.domain / sanitized_metadata.subject / f"{sanitized_metadata.title}.md"
-        
-        if markdown_file_path.exists():
-            vectorstores_path = Path(
-                f"../data/storage/vectorstores/{sanitized_metadata.domain}/{sanitized_metadata.subject}"
-            )
-            vectorstores_path.mkdir(parents=True, exist_ok=True)
-            
-            markdown_chunks = IngestInator(
-                filepath=markdown_file_path,
-                embedding_model=embedding_model,
-                vectorstores_path=vectorstores_path
+        return {"file_path": file_path, "hash_id": hash_id, "metadata": metadata}
+
+    def convert_stage(item: dict):
+        hash_id = item["hash_id"]
+
+        def convert():
+            # page level events are published inside the pool worker, out of reach of this process
+            progress_events.publish_inator(item["file_path"].name, "convert", 0, 1, force=True)
+            stats = convert_pool.convert_inator(item["file_path"], item["metadata"].model_dump(), registry, hash_id)
+            progress_events.publish_inator(item["file_path"].name, "convert", 1, 1)
+            return stats
+
+        stats = convert_once_inator(registry, hash_id, convert)
+        if stats is not None:
+            print(f"Converted {item['file_path'].name}: {stats['pages']} pages in {stats['seconds']}s")
+        return {**item, "markdown_path": registry.markdown_path_inator(hash_id)}
+
+    def chunk_stage(item: dict):
+        # held from the chunk diff until its chunks are embedded, released by embed_stage
+        claim_inator(f"embed:{item['hash_id']}")
+        try:
+            metadata = item["metadata"]
+            return chunk_markdown_inator(
+                item["markdown_path"], metadata.domain, metadata.subject, item["hash_id"], embedding_model, registry
             )
-            
-            chunks = markdown_chunks.chunk_inator(markdown_filepath=markdown_file_path)
-            total = len(chunks)
-            
-            for idx, chunk in enumerate(chunks, start=1):
-                markdown_chunks.embedd_inator(chunk=chunk, collection_name=sanitized_metadata.subject)
-                progress_bar(idx, total)
-            
-            registry.updater_inator(status="embedded", hash_id=hash_id)
-            print(f" Embedded: {file_path.name}")
-        else:
-            print(f" Markdown file not found: {markdown_file_path}")
-            
-    except Exception as e:
-        print(f" Failed to process {file_path.name}: {e}")
+        except BaseException:
+            release_inator(f"embed:{item['hash_id']}")
+            raise
+
+    def embed_stage(plan: dict):
+        try:
+            embed_chunks_inator(plan, registry)
+        finally:
+            release_inator(f"embed:{plan['hash_id']}")
+        return plan["hash_id"]
+
+    def recorded(stage: str, fn):
+        """record the failure reason against the file before the pipeline counts it"""
+        def run(item: dict):
+            try:
+                return fn(item)
+            except Exception as e:
+                registry.fail_inator(item["hash_id"], stage, str(e))
+                raise
+        return run
+
+    with ConvertPoolInator(workers) as convert_pool:
+        pipeline = PipelineInator([
+            ("metadata", metadata_stage, 1),
+            ("convert", recorded("convert", convert_stage), convert_pool.workers),
+            ("chunk", recorded("chunk", chunk_stage), pipeline_workers["chunk"]),
+            ("embed", recorded("embed", embed_stage), pipeline_workers["embed"]),
+        ], queue_size=pipeline_queue_size)
+
+        def on_stats(stages: list[dict]):
+            if report:
+                report(pipeline.finished_inator(), total, stages)
+
+        stages = pipeline.run(file_paths, on_stats=on_stats)
+
+    for stage in stages:
+        print(
+            f"{stage['stage']:>8}: {stage['done']} done, {stage['dropped']} skipped, {stage['failed']} failed, "
+            f"{stage['items_per_sec']}/s, {stage['utilization']:.0%} busy"
+        )
+    return stages
 
 
 # ==========================================================
 # EMBEDDER
 # ==========================================================
-def markdown_embedder_inator(markdown_files_dir: Path, embedding_model: str, registry):
-    """Chunk and embed Markdown files into vectorstores"""
-    walked_markdown_dir = file_walker_inator(markdown_files_dir, max_depth=4)
+def chunk_markdown_inator(markdown_path: Path, domain: str, subject: str, hash_id: str, embedding_model: str, registry) -> dict:
+    """
+    Chunk one Markdown file and diff it against its vectorstore
+    chunks that disappeared from the file are deleted here,
+    what is left to embed comes back as a plan for embed_chunks_inator
+    """
+    vectorstores_path = vectorstores_dir / domain / subject
+    if not vectorstores_path.exists():
+        vectorstores_path.mkdir(parents=True)
 
-    for md_file in walked_markdown_dir:
-        print(md_file["filename"])
+    markdown_chunks = IngestInator(
+        filepath=markdown_path,
+        embedding_model=embedding_model,
+        vectorstores_path=vectorstores_path
+    )
+    # source edited in place: the old markdown's chunks become this file's,
+    # the diff below keeps the unchanged ones and deletes the rest
+    registry.adopt_chunks_inator(hash_id, markdown_path)
+
+    # split the way the stored chunks were unless the model's window says otherwise,
+    # a failed context window lookup must not re-chunk (and re-embed) the whole file
+    spec = registry.chunk_spec_inator(markdown_path)
+    max_tokens = markdown_chunks.chunk_size_inator(fallback=spec[0] if spec else None)
+
+    start = time.perf_counter()
+    chunks = markdown_chunks.chunk_inator(markdown_filepath=markdown_path, max_tokens=max_tokens)
+    registry.stats_inator(hash_id, chunk_seconds=round(time.perf_counter() - start, 3))
+    current_spec = (markdown_chunks.max_tokens, markdown_chunks.tokenizer)
+    if spec and spec[0] is not None and spec != current_spec:
+        print(f"{markdown_path.name}: chunked with {spec[0]} tokens ({spec[1]}) before, "
+              f"now {current_spec[0]} ({current_spec[1]}), re-chunking")
+    stored = registry.chunk_ids_inator(markdown_path)
+    current = {chunk.metadata["chunk_id"] for chunk in chunks}
+
+    # chunks stored under another store (an older layout, or the file was
+    # re-labelled) are moved: dropped there and embedded again here
+    here = (str(vectorstores_path), subject)
+    stale = [chunk_id for chunk_id in stored if chunk_id not in current or stored[chunk_id] != here]
+    remove_chunks_inator(markdown_path, {chunk_id: stored[chunk_id] for chunk_id in stale}, embedding_model, registry)
+    stale_ids = set(stale)
+    stored = {chunk_id: store for chunk_id, store in stored.items() if chunk_id not in stale_ids}
+    if stored and spec != current_spec:
+        registry.set_chunk_spec_inator(markdown_path, *current_spec)
+
+    return {
+        "markdown_path": markdown_path,
+        "hash_id": hash_id,
+        "subject": subject,
+        "vectorstores_path": vectorstores_path,
+        "ingest": markdown_chunks,
+        "new_chunks": [chunk for chunk in chunks if chunk.metadata["chunk_id"] not in stored],
+        "total": len(chunks),
+        "removed": len(stale),
+    }
+
+
+def embed_chunks_inator(plan: dict, registry, report=None):
+    """Embed the new chunks of a chunk_markdown_inator plan, recording progress per batch"""
+    markdown_path, hash_id, subject = plan["markdown_path"], plan["hash_id"], plan["subject"]
+    markdown_chunks, new_chunks, total = plan["ingest"], plan["new_chunks"], plan["total"]
+    vectorstores_path = plan["vectorstores_path"]
+
+    # chunks recorded by an earlier (possibly interrupted) run are already stored
+    done = total - len(new_chunks)
+    if done and new_chunks:
+        print(f"{markdown_path.name}: {done}/{total} chunks already stored, resuming")
+    progress_events.publish_inator(markdown_path.name, "embed", done, total, force=True)
+
+    taxonomy = shared_taxonomy_inator(vectorstores_dir)
+    start = time.perf_counter()
+    for batch in markdown_chunks.batch_inator(new_chunks):
+        markdown_chunks.embedd_inator(chunks=batch, collection_name=subject)
+        done += len(batch)
+
+        # durable progress, at most this one batch is redone after a crash
+        registry.record_chunks_inator(
+            markdown_path,
+            [chunk.metadata["chunk_id"] for chunk in batch],
+            str(vectorstores_path),
+            subject,
+            hash_id=hash_id,
+            embedded_chunks=done,
+            total_chunks=total,
+            max_tokens=markdown_chunks.max_tokens,
+            tokenizer=markdown_chunks.tokenizer
+        )
+        # counted with the batch, an interrupted run leaves the taxonomy matching what was recorded
+        taxonomy.add_chunks_inator(vectorstores_path, subject, len(batch))
+        progress_events.publish_inator(markdown_path.name, "embed", done, total)
+        if report:
+            report(done, total)
+
+    if new_chunks:
+        registry.stats_inator(hash_id, embed_seconds=round(time.perf_counter() - start, 3))
+        store_pool.invalidate_inator(str(vectorstores_path), subject)
+    elif not plan["removed"]:
+        registry.record_chunks_inator(
+            markdown_path, [], str(vectorstores_path), subject,
+            hash_id=hash_id, embedded_chunks=total, total_chunks=total
+        )
+
+    registry.updater_inator(status="embedded", hash_id=hash_id, markdown_path=markdown_path)
+    print(f"{markdown_path.name}: {len(new_chunks)} embedded, {plan['removed']} removed, {total - len(new_chunks)} unchanged")
+
+
+def embed_markdown_inator(markdown_path: Path, domain: str, subject: str, hash_id: str, embedding_model: str, registry,
+                          report=None):
+    """
+    Chunk one Markdown file and sync its vectorstore with it
+    only chunks the store doesn't have yet get embedded,
+    chunks that disappeared from the file are deleted
+    """
+    with claimed_inator(f"embed:{hash_id}"):
+        plan = chunk_markdown_inator(markdown_path, domain, subject, hash_id, embedding_model, registry)
+        embed_chunks_inator(plan, registry, report=report)
+
+
+def remove_chunks_inator(markdown_path: Path | str, chunks: dict[str, tuple[str, str]], embedding_model: str, registry):
+    """delete chunk vectors (chunk_id -> (vectorstore_path, collection)) and forget them"""
+    by_store: dict[tuple[str, str], list[str]] = {}
+    for chunk_id, store in chunks.items():
+        by_store.setdefault(store, []).append(chunk_id)
+
+    for (store_path, collection), chunk_ids in by_store.items():
+        # chunk ids leave the content hash out, two same-titled files can hold the same one
+        shared = registry.shared_chunks_inator(markdown_path, chunk_ids, store_path)
+        IngestInator(
+            filepath=Path(markdown_path),
+            embedding_model=embedding_model,
+            vectorstores_path=store_path
+        ).unembedd_inator(chunk_ids=[chunk_id for chunk_id in chunk_ids if chunk_id not in shared],
+                          collection_name=collection)
+        registry.drop_chunks_inator(markdown_path, chunk_ids)
+        taxonomy = shared_taxonomy_inator(vectorstores_dir)
+        taxonomy.add_chunks_inator(store_path, collection, -len(chunk_ids))
+        if taxonomy.route_inator(Path(store_path).parent.name, collection) is None:
+            # nothing left to route to, don't keep its index open
+            store_pool.evict_inator(store_path)
+        else:
+            store_pool.invalidate_inator(store_path, collection)
+
+
+def forget_source_inator(hash_id: str, registry):
+    """
+    a source pdf is gone: its vectors and its markdown go with its registry row
+    (and the chunks of a replaced markdown still waiting for an embed)
+    """
+    for markdown_path in (registry.markdown_path_inator(hash_id), registry.replaced_markdown_inator(hash_id)):
+        if markdown_path is None:
+            continue
         try:
-            vectorstores_path = Path(
-                f"../data/storage/vectorstores/{md_file['domain']}/{md_file['subject']}"
-            )
-            vectorstores_path.mkdir(parents=True, exist_ok=True)
+            remove_chunks_inator(markdown_path, registry.chunk_ids_inator(markdown_path), embedding_model, registry)
+            markdown_path.unlink(missing_ok=True)
+            markdown_path.with_suffix(".md.partial").unlink(missing_ok=True)
+        except Exception as e:
+            # row stays, the next scan tries again
+            print(f"Failed to remove {markdown_path} for deleted source: {e}")
+            return
+    registry.forget_inator(hash_id)
 
-            markdown_chunks = IngestInator(
-                filepath=md_file["filepath"],
-                embedding_model=embedding_model,
-                vectorstores_path=vectorstores_path
-            )
 
-            hash_id = registry.hash_inator(md_file["filestem"])
+def reset_embedded_inator(registry, hash_id: str | None = None):
+    """
+    the vectors of a file (or every file) about to be reset to not embedded,
+    dropped with their chunk rows and taxonomy counts so the next embed rebuilds them
+    """
+    if hash_id:
+        markdown_path = registry.markdown_path_inator(hash_id)
+        markdown_paths = [markdown_path] if markdown_path else []
+    else:
+        markdown_paths = registry.chunked_files_inator()
+    for markdown_path in markdown_paths:
+        remove_chunks_inator(markdown_path, registry.chunk_ids_inator(markdown_path), embedding_model, registry)
+
+
+def markdown_embedder_inator(markdown_files_dir: Path, embedding_model: str, registry, report=None):
+    """
+    Chunk and embed Markdown files into vectorstores
+    report(done, total) is called as files finish
+    """
+    # only files that changed since the last run, plus anything not embedded
+    # (reset, or never finished); .md skips conversions still in progress (.md.partial)
+    snapshot = WalkSnapshotInator("markdown", markdown_files_dir)
+    walk = snapshot.diff_inator(max_depth=4, suffixes=(".md",))
+    embedded = registry.embedded_markdown_inator()
+    md_files = sorted(
+        walk["changed"] + [md_file for md_file in walk["unchanged"] if str(md_file["filepath"]) not in embedded],
+        key=lambda md_file: md_file["size"]
+    )
+    print(f"{len(md_files)} markdown files to check ({len(walk['unchanged'])} unchanged since the last run)")
+
+    for idx, md_file in enumerate(md_files):
+        if report:
+            report(idx, len(md_files))
+
+        print(md_file["filename"])
+        hash_id = None
+        try:
+            hash_id = registry.markdown_identity_inator(md_file["filepath"])
             is_embedded = registry.check_inator(field="embedded",hash_id=hash_id)
-            if is_embedded:
+            if is_embedded and not registry.markdown_changed_inator(hash_id, md_file["filepath"]):
                 print(f"skipping {md_file['filestem']}")
+                snapshot.record_inator(md_file)
                 continue
-            chunks = markdown_chunks.chunk_inator(markdown_filepath=md_file["filepath"])
-            total = len(chunks)
 
-            for idx, chunk in enumerate(chunks, start=1):
-                markdown_chunks.embedd_inator(chunk=chunk, collection_name=md_file["subject"])
-                progress_bar(idx, total)
+            embed_markdown_inator(
+                markdown_path=md_file["filepath"],
+                domain=md_file["domain"],
+                subject=md_file["subject"],
+                hash_id=hash_id,
+                embedding_model=embedding_model,
+                registry=registry
+            )
+            snapshot.record_inator(md_file)
 
-                # last updated chunk
-                # registry.update_last_embedded_chunk(hash_id, idx)
+        except Exception as e:
+            if hash_id:
+                registry.fail_inator(hash_id, "embed", str(e))
+            print(f"Failed for {md_file['filename']}: {e}")
 
-            # TODO: implement a hash fetcher
-            registry.updater_inator(status="embedded", hash_id=hash_id)
+    snapshot.save_inator()
+    if report:
+        report(len(md_files), len(md_files))
 
+    # markdown files that are gone take their vectors with them
+    for markdown_path in registry.chunked_files_inator():
+        if Path(markdown_path).exists():
+            continue
+        try:
+            remove_chunks_inator(markdown_path, registry.chunk_ids_inator(markdown_path), embedding_model, registry)
+            print(f"removed vectors for deleted file {markdown_path}")
         except Exception as e:
-            print(f"Failed for {md_file['filename']}: {e}")
+            print(f"Failed to remove vectors for {markdown_path}: {e}")
+
+
+# ==========================================================
+# JOBS
+# ==========================================================
+def ingest_job_handlers(registry, queue: JobQueueInator, workers: IngestWorkerInator | None = None) -> dict:
+    """
+    (stage, kind) -> handler for the ingest worker pool
+        library/convert   bulk conversion of the knowledgebase
+        library/embed     bulk embedding of knowledgebase/markdown
+        library/ingest    the whole knowledgebase, through the overlapped ingest pipeline
+        convert/file      one uploaded pdf, queues embed/file when done
+        convert/batch     a bulk upload, through the overlapped ingest pipeline
+        embed/file        one markdown file
+    """
+    def convert_library(job, report):
+        markdown_converter_inator(knowledgebase_dir, llm_model, registry, job["payload"].get("workers", 1), report=report)
+
+    def embed_library(job, report):
+        markdown_embedder_inator(markdown_files_dir, embedding_model, registry, report=report)
+
+    def convert_file(job, report):
+        file_path = Path(job["payload"]["path"])
+        report(0, 1)
+        hash_id, metadata, markdown_path = convert_single_pdf(file_path, llm_model, registry)
+        report(1, 1)
+
+        queue.enqueue_inator(
+            stage="embed",
+            kind="file",
+            payload={
+                "path": str(markdown_path),
+                "hash_id": hash_id,
+                "domain": metadata.domain,
+                "subject": metadata.subject,
+            },
+            priority=job["priority"],
+            dedup_key=f"embed:{hash_id}",
+            cost=registry.cost_inator({hash_id: markdown_path.stat().st_size}, "embed")[hash_id]
+        )
+        if workers:
+            workers.wake()
+
+    def convert_batch(job, report):
+        file_paths = [Path(path) for path in job["payload"]["paths"]]
+        pipeline_ingest_inator(
+            file_paths, llm_model, embedding_model, registry,
+            workers=job["payload"].get("workers", 1),
+            report=report,
+            hash_ids=dict(zip(file_paths, job["payload"].get("hash_ids", [])))
+        )
+
+    def ingest_library(job, report):
+        scan = registry.scan_inator(knowledgebase_dir)
+        for removed in scan["deleted"]:
+            forget_source_inator(removed["hash_id"], registry)
+
+        # one copy per content hash, the metadata stage drops whatever is already embedded
+        by_hash = {}
+        for file_info in scan["added"] + scan["changed"] + scan["unchanged"] + scan["moved"]:
+            by_hash.setdefault(file_info["hash_id"], file_info["filepath"])
+        pipeline_ingest_inator(
+            list(by_hash.values()), llm_model, embedding_model, registry,
+            workers=job["payload"].get("workers", 1),
+            report=report,
+            hash_ids={file_path: hash_id for hash_id, file_path in by_hash.items()}
+        )
+
+    def embed_file(job, report):
+        payload = job["payload"]
+        embed_markdown_inator(
+            markdown_path=Path(payload["path"]),
+            domain=payload["domain"],
+            subject=payload["subject"],
+            hash_id=payload["hash_id"],
+            embedding_model=embedding_model,
+            registry=registry,
+            report=report
+        )
+
+    return {
+        ("library", "convert"): convert_library,
+        ("library", "embed"): embed_library,
+        ("library", "ingest"): ingest_library,
+        ("convert", "file"): convert_file,
+        ("convert", "batch"): convert_batch,
+        ("embed", "file"): embed_file,
+    }
+
+
+def warm_stores_inator(limit: int = STORE_WARMUP) -> int:
+    """
+    open the most used stores ahead of the first chat
+    ranked by uses in earlier runs, then by chunk count
+    """
+    usage = store_pool.usage_inator()
+    ranked = [
+        (subject.store_path, subject.name, usage.get((subject.store_path, subject.name), 0), subject.chunk_count or 0)
+        for domain in shared_taxonomy_inator(vectorstores_dir).knowledgebase.domains
+        for subject in domain.subjects
+    ]
+    ranked.sort(key=lambda store: (store[2], store[3]), reverse=True)
+    stores = [(store_path, collection) for store_path, collection, _, _ in ranked]
+    return store_pool.warm_inator(stores, embedding_model, limit=limit)
+
+
+def start_ingest_workers(registry, queue: JobQueueInator) -> IngestWorkerInator:
+    """worker pool for the lifespan of the app"""
+    for (stage, kind), (new_stage, new_kind) in LEGACY_LIBRARY_JOBS.items():
+        queue.restage_inator(stage, kind, new_stage, new_kind)
+    workers = IngestWorkerInator(queue, handlers={}, workers=ingest_workers)
+    workers.handlers = ingest_job_handlers(registry, queue, workers)
+    return workers.start()
+
+
+def _wake_workers(request: Request):
+    workers = getattr(request.app.state, "ingest_workers", None)
+    if workers:
+        workers.wake()
 
 
 # ==========================================================
 # ROUTES
 # ==========================================================
 @router.get("/")
-async def stats(request: Request):
+async def stats(request: Request, cursor: int = 0, limit: int = 100, status: str | None = None):
+    """
+    Registry rows a page at a time
+    pass next_cursor back as cursor for the following page
+    status: not_converted, not_embedded or failed
+    """
     reg = request.app.state.registry
-    data = reg.show_all_inator() or []
-    return {"registry": data}
+    try:
+        data, next_cursor = reg.page_inator(cursor_id=cursor, limit=max(1, min(limit, 1000)), status=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"registry": data, "next_cursor": next_cursor}
+
+
+@router.post("/status")
+async def bulk_status(request: Request, hash_ids: list[str] = Body(...)):
+    """converted/embedded/error and chunks embedded so far per hash_id, for many files in one request"""
+    reg = request.app.state.registry
+    return {"status": reg.status_inator(hash_ids)}
+
+@router.get("/throughput")
+async def throughput(request: Request):
+    """library wide sizes, per-stage durations, rates, failures and the slowest files"""
+    reg = request.app.state.registry
+    return reg.throughput_inator()
+
+
+@router.get("/embedding-cache")
+async def embedding_cache_stats():
+    """hit/miss counters for the shared embedding cache"""
+    return {"embedding_cache": store_pool.cache_stats_inator()}
+
+@router.get("/store-pool")
+async def store_pool_stats():
+    """open vectorstore handles, their estimated size against the budget, evictions"""
+    return store_pool.stats_inator()
+
+@router.get("/taxonomy")
+async def taxonomy():
+    """domain -> subject -> vectorstore map with chunk counts, what queries get routed against"""
+    return shared_taxonomy_inator(vectorstores_dir).knowledgebase
+
+@router.post("/taxonomy/rebuild")
+async def rebuild_taxonomy(request: Request):
+    """recount the taxonomy from the registry and the stores on disk"""
+    reg = request.app.state.registry
+    return shared_taxonomy_inator(vectorstores_dir).rebuild_inator(reg)
 
 @router.post("/reset/{status}")
 async def reset(status: str,request: Request,  hash_id: str | None = None):
     reg = request.app.state.registry
+    if status == "embedded":
+        await asyncio.to_thread(reset_embedded_inator, reg, hash_id)
     data = reg.reset_inator(status, hash_id)
     return data
 
+@router.get("/events")
+async def progress_stream(request: Request):
+    """
+    Server-Sent Events stream of ingest progress
+    each event: file, stage, index, total, rate (units/sec), eta (seconds)
+    reconnecting clients get what they missed via Last-Event-ID
+    """
+    try:
+        last_id = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        last_id = 0
+
+    async def event_stream():
+        queue = progress_events.subscribe_inator(last_id)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=events_keepalive)
+                except asyncio.TimeoutError:
+                    # comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+        finally:
+            progress_events.unsubscribe_inator(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/jobs")
+async def list_jobs(request: Request, state: str | None = None, limit: int = 100):
+    """Ingest jobs, newest first, with progress and throughput"""
+    queue = request.app.state.job_queue
+    return {"jobs": queue.jobs_inator(state=state, limit=limit)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: int, request: Request):
+    queue = request.app.state.job_queue
+    job = queue.job_inator(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @router.post("/markdowninator")
-async def convert_files(background_tasks: BackgroundTasks, request: Request):
-    """Queue Markdown conversion in background"""
-    reg = request.app.state.registry
-    background_tasks.add_task(markdown_converter_inator, knowledgebase_dir, llm_model, reg)
-    return {"message": "Conversion started in background"}
+async def convert_files(request: Request, workers: int = convert_workers):
+    """Queue Markdown conversion of the whole knowledgebase"""
+    queue = request.app.state.job_queue
+    job_id, created = queue.enqueue_inator(
+        stage="library",
+        kind="convert",
+        payload={"workers": max(1, workers)},
+        priority=PRIORITY_BULK,
+        dedup_key="convert:library"
+    )
+    _wake_workers(request)
+    message = "Conversion queued" if created else "Conversion already queued"
+    return {"message": message, "job_id": job_id, "workers": max(1, workers)}
 
 
 @router.post("/embeddinator")
-async def embedd_files(background_tasks: BackgroundTasks, request: Request):
-    """Queue Markdown embedding in background"""
-    reg = request.app.state.registry
-    background_tasks.add_task(markdown_embedder_inator, markdown_files_dir, embedding_model, reg)
-    return {"message": "Embedding started in background"}
+async def embedd_files(request: Request):
+    """Queue Markdown embedding of the whole knowledgebase"""
+    queue = request.app.state.job_queue
+    job_id, created = queue.enqueue_inator(
+        stage="library",
+        kind="embed",
+        payload={},
+        priority=PRIORITY_BULK,
+        dedup_key="embed:library"
+    )
+    _wake_workers(request)
+    message = "Embedding queued" if created else "Embedding already queued"
+    return {"message": message, "job_id": job_id}
+
+
+async def save_upload_inator(file: UploadFile, dest_dir: Path, max_bytes: int | None = None) -> tuple[Path, str]:
+    """
+    Stream an upload to a .part file in dest_dir, hashing it in the same pass
+    every upload gets its own .part, two uploads of one filename never share it
+    the caller places it (place_upload_inator) or drops it once it knows the hash
+    returns (partial path, content hash)
+    """
+    max_bytes = max_bytes or max_upload_bytes
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    fd, partial_name = tempfile.mkstemp(dir=dest_dir, prefix=f"{Path(file.filename).stem}-", suffix=".part")
+    partial_path = Path(partial_name)
+
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            def write(chunk: bytes):
+                digest.update(chunk)
+                f.write(chunk)
+
+            while chunk := await file.read(upload_chunk_size):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{file.filename} is larger than {max_bytes // (1024 * 1024)} MB"
+                    )
+                # hashing and disk writes stay off the event loop
+                await asyncio.to_thread(write, chunk)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+    return partial_path, digest.hexdigest()
+
+
+async def upload_limit_middleware(request: Request, call_next):
+    """
+    turn uploads over the limit away on their Content-Length, before Starlette
+    spools the whole body to a temp file (save_upload_inator still checks what
+    arrives, for clients that send no length)
+    """
+    limits = {
+        f"{router.prefix}/upload": max_upload_bytes + upload_overhead_bytes,
+        f"{router.prefix}/upload/bulk": max_bulk_upload_bytes,
+    }
+    limit = limits.get(request.url.path.rstrip("/")) if request.method == "POST" else None
+    content_length = request.headers.get("content-length", "")
+    if limit and content_length.isdigit() and int(content_length) > limit:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"upload is larger than {limit // (1024 * 1024)} MB"}
+        )
+    return await call_next(request)
+
+
+def place_upload_inator(partial_path: Path, dest_dir: Path, filename: str, hash_id: str) -> Path:
+    """
+    Move a finished .part into dest_dir without overwriting another file
+    the upload keeps its own name when that is free, otherwise it becomes
+    <stem>-<hash>.pdf (then <stem>-<hash>-1.pdf, ...)
+    returns the final path, always a file this call created
+    """
+    name = Path(filename).name
+    stem, suffix = Path(name).stem, Path(name).suffix
+    attempt = 0
+    while True:
+        if attempt == 0:
+            candidate = dest_dir / name
+        elif attempt == 1:
+            candidate = dest_dir / f"{stem}-{hash_id[:12]}{suffix}"
+        else:
+            candidate = dest_dir / f"{stem}-{hash_id[:12]}-{attempt - 1}{suffix}"
+        attempt += 1
+        try:
+            # claim the name first, so a concurrent upload can't pick it too
+            with open(candidate, "x"):
+                pass
+        except FileExistsError:
+            continue
+        os.replace(partial_path, candidate)
+        return candidate
+
+
+@router.post("/ingestinator")
+async def ingest_files(request: Request, workers: int = convert_workers):
+    """
+    Queue conversion and embedding of the whole knowledgebase as one overlapped run
+    per-stage queue depth and throughput show up on the job as "stages"
+    """
+    queue = request.app.state.job_queue
+    job_id, created = queue.enqueue_inator(
+        stage="library",
+        kind="ingest",
+        payload={"workers": max(1, workers)},
+        priority=PRIORITY_BULK,
+        dedup_key="ingest:library"
+    )
+    _wake_workers(request)
+    message = "Ingest queued" if created else "Ingest already queued"
+    return {"message": message, "job_id": job_id, "workers": max(1, workers)}
 
 
 @router.post("/upload")
 async def upload_pdf(
-    background_tasks: BackgroundTasks,
     request: Request,
     file: UploadFile = File(...)
 ):
@@ -200,39 +990,163 @@ async def upload_pdf(
     # Validate file type
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    
-    # Ensure knowledgebase directory exists
-    knowledgebase_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Save file
-    if file.filename is None:
-        raise ValueError("filename cannot be None")
 
     # TODO: dir aware file uploads?
-    file_path = knowledgebase_dir / "uploads" /file.filename
-    
     try:
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        
-        # Auto-process the uploaded PDF
-        if background_tasks and request:
-            reg = request.app.state.registry
-            # Convert to markdown
-            background_tasks.add_task(
-                process_single_pdf,
-                file_path,
-                llm_model,
-                embedding_model,
-                reg
-            )
-        
+        partial_path, hash_id = await save_upload_inator(file, knowledgebase_dir / "uploads")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+
+    # same content already ingested, keep the copy we have and queue nothing
+    reg = request.app.state.registry
+    registered_path = reg.source_path_inator(hash_id)
+    if registered_path and registered_path.exists() and reg.check_inator(hash_id=hash_id, field="embedded"):
+        partial_path.unlink(missing_ok=True)
         return {
-            "message": "PDF uploaded and queued for processing",
+            "message": "PDF already ingested",
             "filename": file.filename,
-            "path": str(file_path)
+            "path": str(registered_path),
+            "hash_id": hash_id,
+            "job_id": None
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
+    file_path = place_upload_inator(partial_path, knowledgebase_dir / "uploads", file.filename, hash_id)
+
+    # Auto-process the uploaded PDF, ahead of any bulk jobs
+    queue = request.app.state.job_queue
+    job_id, created = queue.enqueue_inator(
+        stage="convert",
+        kind="file",
+        payload={"path": str(file_path)},
+        priority=PRIORITY_UPLOAD,
+        dedup_key=f"convert:{hash_id}",
+        cost=reg.cost_inator({hash_id: file_path.stat().st_size}, "convert")[hash_id]
+    )
+    _wake_workers(request)
+
+    return {
+        "message": "PDF uploaded and queued for processing" if created else "PDF already queued",
+        "filename": file.filename,
+        "path": str(file_path),
+        "hash_id": hash_id,
+        "job_id": job_id
+    }
+
+
+def extract_archive_inator(archive_path: Path, dest_dir: Path, max_bytes: int | None = None) -> list[tuple[Path, str]]:
+    """
+    Unpack the PDFs in a zip archive into dest_dir
+    member paths are flattened, so nothing can land outside dest_dir,
+    and members are hashed as they are written, then placed like uploads
+    returns (path, content hash) per pdf
+    """
+    max_bytes = max_bytes or max_upload_bytes
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    extracted = []
+
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.infolist():
+            name = Path(member.filename).name
+            if member.is_dir() or not name.lower().endswith(".pdf") or name.startswith("."):
+                continue
+            if member.file_size > max_bytes:
+                print(f"Skipping {member.filename}: larger than {max_bytes // (1024 * 1024)} MB")
+                continue
+
+            fd, partial_name = tempfile.mkstemp(dir=dest_dir, prefix=f"{Path(name).stem}-", suffix=".part")
+            digest = hashlib.sha256()
+            try:
+                with archive.open(member) as src, os.fdopen(fd, "wb") as dst:
+                    while block := src.read(upload_chunk_size):
+                        digest.update(block)
+                        dst.write(block)
+            except BaseException:
+                Path(partial_name).unlink(missing_ok=True)
+                raise
+            hash_id = digest.hexdigest()
+            extracted.append((place_upload_inator(Path(partial_name), dest_dir, name, hash_id), hash_id))
+
+    return extracted
+
+
+@router.post("/upload/bulk")
+async def upload_bulk(
+    request: Request,
+    files: list[UploadFile] = File(...)
+):
+    """
+    Upload many PDFs (or zip archives of them) and ingest them as one batch
+    poll /process/jobs/{batch_id} for progress
+    """
+    reg = request.app.state.registry
+    uploads_dir = knowledgebase_dir / "uploads"
+
+    batch: dict[str, Path] = {}
+    skipped = []
+    rejected = []
+
+    for file in files:
+        name = file.filename or ""
+        suffix = Path(name).suffix.lower()
+        if suffix not in (".pdf", ".zip"):
+            rejected.append({"filename": name, "reason": "only PDF and zip files are allowed"})
+            continue
+
+        try:
+            partial_path, hash_id = await save_upload_inator(file, uploads_dir)
+        except HTTPException as e:
+            rejected.append({"filename": name, "reason": e.detail})
+            continue
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to upload {name}: {str(e)}")
+
+        if suffix == ".zip":
+            try:
+                hashed = await asyncio.to_thread(
+                    extract_archive_inator, partial_path, uploads_dir / Path(name).stem
+                )
+            except zipfile.BadZipFile:
+                rejected.append({"filename": name, "reason": "not a valid zip archive"})
+                continue
+            finally:
+                partial_path.unlink(missing_ok=True)
+        else:
+            hashed = [(place_upload_inator(partial_path, uploads_dir, name, hash_id), hash_id)]
+
+        statuses = reg.status_inator([hash_id for _, hash_id in hashed])
+        for file_path, hash_id in hashed:
+            status = statuses.get(hash_id) or {}
+            registered_path = Path(status["source_path"]) if status.get("source_path") else None
+            already_ingested = registered_path and registered_path.exists() and status["embedded"]
+            if hash_id in batch or already_ingested:
+                # the copy that was already there (or first in this batch) wins
+                if file_path != (batch.get(hash_id) or registered_path):
+                    file_path.unlink(missing_ok=True)
+                skipped.append({"filename": file_path.name, "hash_id": hash_id})
+                continue
+            batch[hash_id] = file_path
+
+    if not batch:
+        return {"message": "Nothing new to ingest", "batch_id": None, "queued": 0, "skipped": skipped, "rejected": rejected}
+
+    queue = request.app.state.job_queue
+    batch_key = hashlib.sha256("".join(sorted(batch)).encode()).hexdigest()
+    batch_id, created = queue.enqueue_inator(
+        stage="convert",
+        kind="batch",
+        payload={"paths": [str(path) for path in batch.values()], "hash_ids": list(batch), "workers": convert_workers},
+        priority=PRIORITY_UPLOAD,
+        dedup_key=f"batch:{batch_key}",
+        cost=sum(reg.cost_inator({hash_id: path.stat().st_size for hash_id, path in batch.items()}, "ingest").values())
+    )
+    _wake_workers(request)
+
+    return {
+        "message": "Batch queued for processing" if created else "Batch already queued",
+        "batch_id": batch_id,
+        "queued": len(batch),
+        "skipped": skipped,
+        "rejected": rejected
+    }
@@ -1,14 +1,13 @@
 import json
 import shutil
 import logging
-from typing import List
+from typing import List, Literal, Optional
 from pathlib import Path
 from datetime import datetime
 
 from pydantic import BaseModel
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from cerebrum_core.retriever_inator import RetrieverInator
 from cerebrum_core.file_manager_inator import CerebrumPaths
 from cerebrum_core.model_inator import CreateResearchProject, NoteOut, NoteBase, ResearchProject
 
@@ -16,9 +15,6 @@ from cerebrum_core.model_inator import CreateResearchProject, NoteOut, NoteBase,
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-llm_model = "granite4:micro"
-embedding_model = "qwen3-embedding:4b-q4_K_M"
-
 # --------------------------- router & paths --------------------------- #
 project_router = APIRouter(prefix="/projects", tags=["Project API"])
 
@@ -198,28 +194,21 @@ def delete_note(project_id: str,  filename: str):
 # ------------------------------- CHAT -------------------------------- #
 class Query(BaseModel):
     text: str
+    # chunk compression for this chat (concurrent, batched, raw), the retriever's default if unset
+    compression: Optional[Literal["concurrent", "batched", "raw"]] = None
 
 
 @project_router.post("/{project_id}/chat")
-async def chat_in_project(project_id: str, query: Query):
+async def chat_in_project(project_id: str, query: Query, request: Request):
     """
     Chat inside a specific project.
     Uses the global vectorstore root but you can adapt to per-project vectorstores easily.
+    The retriever is the app wide one from the lifespan, this request's state stays in its own object.
+    Fully async, a long chat doesn't hold up other requests.
     """
-    vectorstores_root = VECTORSTORES_ROOT
-
-    processor = RetrieverInator(
-        vectorstores_root=str(vectorstores_root),
-        embedding_model=embedding_model,
-        llm_model=llm_model,
-    )
-
-    translated_query = processor.translator_inator(user_query=query.text)
-    logger.info("Translated query dict: %s", translated_query)
-
-    processor.constructor_inator(translated_query=translated_query)
-    processor.retrieve_inator()
-    response = processor.generate_inator(user_query=query.text)
+    retriever = request.app.state.retriever
 
-    return {"reply": response}
+    state = await retriever.async_answer_inator(user_query=query.text, compression=query.compression)
+    logger.info("Translated query dict: %s", state.translated_query)
 
+    return {"reply": state.response, "timings": state.timings}
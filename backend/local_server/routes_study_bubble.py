@@ -1,14 +1,13 @@
 import json
 import shutil
 import logging
-from typing import List
+from typing import List, Literal, Optional
 from pathlib import Path
 from datetime import datetime
 
 from pydantic import BaseModel
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from cerebrum_core.retriever_inator import RetrieverInator
 from cerebrum_core.file_manager_inator import CerebrumPaths
 from cerebrum_core.model_inator import CreateStudyBubble, NoteOut, NoteBase, StudyBubble
 
@@ -18,10 +17,6 @@ bubble_router = APIRouter(prefix="/bubbles", tags=["Study Bubble API"])
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Config
-llm_model = "granite4:micro"
-embedding_model = "qwen3-embedding:4b-q4_K_M"
-
 CEREBRUM_PATHS = CerebrumPaths()
 ROOT_KB_DIR = CEREBRUM_PATHS.get_kb_dir()
 
@@ -216,35 +211,21 @@ def delete_note(bubble_id: str, filename: str):
 
 class Query(BaseModel):
     text: str
+    # chunk compression for this chat (concurrent, batched, raw), the retriever's default if unset
+    compression: Optional[Literal["concurrent", "batched", "raw"]] = None
 
 
 @bubble_router.post("/{bubble_id}/chat")
-async def chat_in_bubble(bubble_id: str, query: Query):
+async def chat_in_bubble(bubble_id: str, query: Query, request: Request):
     """
     Chat inside a specific study bubble.
+    The retriever is the app wide one from the lifespan, this request's state stays in its own object.
+    Fully async, a long chat doesn't hold up other requests.
     """
-    vectorstore_root = VECTORSTORES_DIR
-
-    processor = RetrieverInator(
-        vectorstores_root=str(vectorstore_root),
-        embedding_model=embedding_model,
-        llm_model=llm_model,
-    )
-
-    # TRANSLATE USER QUERY
-    translated_query = processor.translator_inator(
-        user_query=query.text
-    )
-    logger.info("Translated Query: %s", translated_query)
-
-    # CONSTRUCT CONTEXT
-    processor.constructor_inator(translated_query=translated_query)
-
-    # RETRIEVE
-    processor.retrieve_inator()
-
-    # GENERATE RESPONSE
-    response = processor.generate_inator(user_query=query.text)
+    retriever = request.app.state.retriever
 
-    return {"reply": response}
+    # TRANSLATE, CONSTRUCT, RETRIEVE, GENERATE
+    state = await retriever.async_answer_inator(user_query=query.text, compression=query.compression)
+    logger.info("Translated Query: %s", state.translated_query)
 
+    return {"reply": state.response, "timings": state.timings}
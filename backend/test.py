@@ -13,13 +13,12 @@ pdf_path = pathlib.Path("../data/knowledgebase/biology/physiology/Johnny Hall -
 
 # %% 
 from pathlib import Path
-from cerebrum_core.file_manager_inator import knowledgebase_index_inator
+from cerebrum_core.taxonomy_inator import TaxonomyInator
 
-test, testfile = knowledgebase_index_inator(Path("../data/storage/vectorstores"))
-for test in test:
-    print(test["domain"])
-    print(test["subject"])
-    print(testfile)
+taxonomy = TaxonomyInator(Path("../data/storage/vectorstores"))
+for domain in taxonomy.knowledgebase.domains:
+    print(domain.name)
+    print([subject.name for subject in domain.subjects])
 
 
 with pymupdf.open(pdf_path) as file:
@@ -59,8 +58,8 @@ print(constructor)
 for route in constructor["routes"]:
     print(route["subquery"].subject)
 
-retrieve.retrieve_inator()
-response = retrieve.generate_inator(user_query=query)
+results = retrieve.retrieve_inator(constructor)
+response = retrieve.generate_inator(user_query=query, all_results=results)
 print(response)
 
 #%%